@@ -37,12 +37,17 @@ def create_app():
     - Initializes Flask extensions (DB, Migrations, JWT)
     - Registers API blueprints (character routes, authentication)
     - Configures error handling
+    - Registers custom CLI commands
     """
     app = Flask(__name__)
 
     # Load configuration
     app.config.from_object(Config)
 
+    # Encode JSON responses with orjson (falls back to the stdlib json module if it is not installed)
+    from app.utils.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -63,6 +68,22 @@ def create_app():
     app.register_error_handler(SQLAlchemyError, handle_sqlalchemy_error)
     app.register_error_handler(ValidationError, handle_validation_error)
 
+    # Guard against N+1 queries (only active when MAX_QUERIES_PER_REQUEST is set)
+    from app.utils.query_guard import register_query_guard
+    register_query_guard(app)
+
+    # Keep the denormalized character_read table in sync with character, house and strength writes
+    from app.utils.read_model import register_read_model_sync
+    register_read_model_sync()
+
+    # Drop the process-local copy of houses and strengths when this process commits changes to them
+    from app.utils.dimensions import register_dimension_cache
+    register_dimension_cache()
+
+    # Register CLI commands (flask build-json-snapshot, ...)
+    from app.commands import register_commands
+    register_commands(app)
+
     setup_logging()  # Ensures logging is configured when the app starts
 
     return app
@@ -0,0 +1,127 @@
+"""
+Custom `flask` CLI commands, registered on the app in create_app().
+"""
+
+import click
+from flask.cli import with_appcontext
+from app import db
+from app.utils.character_import import IMPORT_CHUNK_SIZE, import_characters, iter_characters, sync_characters
+from app.utils.json_store import CHARACTERS_JSON_PATH, character_store
+from app.utils.json_snapshot import write_snapshot
+from app.utils.query_plans import check_query_plans
+from app.utils.read_model import rebuild_read_model
+from app.utils.response_cache import response_cache
+
+
+@click.command("build-json-snapshot")
+def build_json_snapshot():
+    """
+    Writes data/characters.bin, the binary snapshot of the JSON characters that workers load instead of parsing JSON.
+    """
+    characters = character_store.all()
+    write_snapshot(characters, character_store.binary_snapshot_path)
+    click.echo(f"Wrote {len(characters)} characters to {character_store.binary_snapshot_path}")
+
+
+@click.command("check-query-plans")
+@with_appcontext
+def check_query_plans_command():
+    """
+    Explains the character listing for every supported filter/sort combination and
+    fails if any plan reads the whole character_read table instead of using an index.
+    """
+    full_scans = 0
+    for filters, sort_by, full_scan, nodes in check_query_plans():
+        used = ", ".join(sorted({node["index"] for node in nodes if node["index"]})) or "-"
+        click.echo(f"{'FULL SCAN' if full_scan else 'ok':9}  filters={filters} sort_by={sort_by}  indexes: {used}")
+        full_scans += full_scan
+
+    if full_scans:
+        raise click.ClickException(f"{full_scans} listing queries scan the whole character_read table")
+    click.echo("All listing queries use an index")
+
+
+@click.command("rebuild-read-model")
+@with_appcontext
+def rebuild_read_model_command():
+    """
+    Rebuilds the character_read table (the denormalized listing model) from characters, houses and strengths.
+    """
+    count = rebuild_read_model(db.session.connection())
+    db.session.commit()
+    click.echo(f"Rebuilt character_read with {count} characters")
+
+
+@click.command("import-characters")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False), default=CHARACTERS_JSON_PATH)
+@click.option("--chunk-size", type=click.IntRange(min=1), default=IMPORT_CHUNK_SIZE, show_default=True,
+              help="Characters written per COPY / executemany.")
+@with_appcontext
+def import_characters_command(path, chunk_size):
+    """
+    Imports the characters of a JSON file (an array like data/characters.json, default) into the database,
+    including JSON API writes still in the file's journal (see iter_characters).
+    The file is streamed, houses and strengths are created as needed, existing names are skipped.
+    Runs in one transaction and prints the throughput after every chunk.
+    """
+    def report(stats):
+        click.echo(f"  {stats['read']} characters read, {stats['rows_per_second']:.0f} rows/s")
+
+    try:
+        stats = import_characters(db.session.connection(), iter_characters(path), chunk_size, report)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    response_cache.invalidate("db")
+
+    click.echo(
+        f"Imported {stats['inserted']} of {stats['read']} characters ({stats['skipped']} invalid) "
+        f"in {stats['seconds']:.2f}s, {stats['rows_per_second']:.0f} rows/s"
+    )
+
+
+@click.command("sync-characters")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False), default=CHARACTERS_JSON_PATH)
+@click.option("--chunk-size", type=click.IntRange(min=1), default=IMPORT_CHUNK_SIZE, show_default=True,
+              help="Records hashed and written per batch.")
+@click.option("--dry-run", is_flag=True, help="Report what would change, then roll back.")
+@with_appcontext
+def sync_characters_command(path, chunk_size, dry_run):
+    """
+    Brings the database in line with a characters file (data/characters.json by default): inserts new records,
+    updates the ones whose content hash changed and deletes synced characters that left the file.
+    JSON API writes still in the file's journal count as part of it (see iter_characters).
+    Unchanged records are not written. Runs in one transaction.
+    """
+    def report(stats):
+        click.echo(f"  {stats['read']} records read, {stats['rows_per_second']:.0f} rows/s")
+
+    try:
+        stats = sync_characters(db.session.connection(), iter_characters(path), chunk_size, report)
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    if not dry_run:
+        response_cache.invalidate("db")
+
+    click.echo(
+        f"{'Would apply' if dry_run else 'Applied'}: {stats['inserted']} inserted, {stats['updated']} updated, "
+        f"{stats['deleted']} deleted, {stats['unchanged']} unchanged, {stats['skipped']} skipped "
+        f"({stats['read']} records in {stats['seconds']:.2f}s, {stats['rows_per_second']:.0f} rows/s)"
+    )
+
+
+def register_commands(app):
+    """
+    Registers the custom CLI commands on the Flask app.
+    """
+    app.cli.add_command(build_json_snapshot)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(import_characters_command)
+    app.cli.add_command(rebuild_read_model_command)
+    app.cli.add_command(sync_characters_command)
@@ -13,6 +13,38 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "default_jwt_key")
 
+    # Seconds an exact count of a filtered character listing is reused
+    COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", 10))
+
+    # Seconds a list response is cached (0 disables the response cache), and the number of cached responses
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 30))
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+    # Share cached responses between workers through Redis (e.g. redis://localhost:6379/0), in-process when unset
+    RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+
+    # Seconds a listing waits for an identical in-flight query before running its own (0 disables coalescing)
+    LIST_COALESCE_TIMEOUT = float(os.getenv("LIST_COALESCE_TIMEOUT", 5))
+
+    # Maximum number of items of one /characters/bulk request, and whether a bulk request is applied
+    # all-or-nothing when it doesn't say (?atomic=true|false)
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 5000))
+    BULK_ATOMIC = os.getenv("BULK_ATOMIC", "true").lower() == "true"
+
+    # Seconds the process-local copy of houses and strengths is trusted before its generation is checked again
+    DIMENSION_CACHE_TTL = float(os.getenv("DIMENSION_CACHE_TTL", 5))
+
+    # Fail any request that issues more SQL statements than this (meant for tests and development, off when unset)
+    MAX_QUERIES_PER_REQUEST = int(os.getenv("MAX_QUERIES_PER_REQUEST", 0)) or None
+
+    # Number of journal entries after which the JSON store compacts them into a new characters.json snapshot
+    JSON_JOURNAL_COMPACT_THRESHOLD = int(os.getenv("JSON_JOURNAL_COMPACT_THRESHOLD", 500))
+    # How long the JSON store's writer waits for more writes to commit them together with a single fsync
+    JSON_GROUP_COMMIT_WINDOW_MS = float(os.getenv("JSON_GROUP_COMMIT_WINDOW_MS", 2))
+    # Seconds a JSON write waits for the writer thread before giving up (the write may still be committed later)
+    JSON_WRITE_TIMEOUT = float(os.getenv("JSON_WRITE_TIMEOUT", 30))
+    # Keep a binary snapshot (data/characters.bin) next to characters.json so workers start without parsing JSON
+    JSON_BINARY_SNAPSHOT = os.getenv("JSON_BINARY_SNAPSHOT", "false").lower() == "true"
+
 
 def setup_logging():
     """
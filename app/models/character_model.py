@@ -66,9 +66,27 @@ class Character(db.Model):
         age (int): The character's age (if applicable).
         death (int): The year the character died (if applicable).
         strength_id (int): The foreign key linking to the associated Strength.
+        version (int): Incremented on every update, used for ETags and optimistic concurrency.
+        source_hash (str): Content hash of the characters.json record last synced into this row
+            (see sync_characters), None for characters that were never synced.
     """
     __tablename__ = "characters"
 
+    # Indexes for the filter/sort patterns of apply_filters()/apply_sorting() (see migration 0003):
+    # sort columns are paired with id, the tiebreaker of every sorted listing, and the foreign keys lead
+    # composites for "filter by house/strength, sort by name"
+    __table_args__ = (
+        db.Index("ix_characters_name_id", "name", "id"),
+        db.Index("ix_characters_house_id_name_id", "house_id", "name", "id"),
+        db.Index("ix_characters_strength_id_name_id", "strength_id", "name", "id"),
+        db.Index("ix_characters_age_id", "age", "id"),
+        db.Index("ix_characters_role_id", "role", "id"),
+        db.Index("ix_characters_nickname_id", "nickname", "id"),
+        db.Index("ix_characters_animal_id", "animal", "id"),
+        db.Index("ix_characters_symbol_id", "symbol", "id"),
+        db.Index("ix_characters_death_id", "death", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     house_id = db.Column(db.Integer, db.ForeignKey("houses.id"), nullable=True)
@@ -79,10 +97,16 @@ class Character(db.Model):
     age = db.Column(db.Integer, nullable=True)
     death = db.Column(db.Integer, nullable=True)
     strength_id = db.Column(db.Integer, db.ForeignKey("strengths.id"), nullable=False)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    source_hash = db.Column(db.String(40), nullable=True)
 
     house = db.relationship("House", back_populates="characters")
     strength = db.relationship("Strength", back_populates="characters")
 
+    # The ORM increments `version` on every UPDATE and adds "WHERE version = <loaded version>" to UPDATEs and
+    # DELETEs, a row changed by someone else in the meantime raises StaleDataError instead of being overwritten
+    __mapper_args__ = {"version_id_col": version}
+
     def to_dict(self):
         """
         Convert the Character object to a dictionary, including related models.
@@ -111,3 +135,71 @@ class Character(db.Model):
         """
         # method helps in debugging by providing a string representation
         return f"<Character {self.name}>"
+
+
+class CharacterRead(db.Model):
+    """
+    Denormalized, read-only copy of a character that carries its house name and strength description inline.
+    The character listing reads from this table, so filtering and sorting by house or strength is a
+    single-table (index) scan instead of a join.
+
+    Rows are kept current by app.utils.read_model whenever characters, houses or strengths are written
+    through the session. Never write to this table directly.
+
+    Attributes:
+        id (int): The id of the character (same as characters.id).
+        house_name (str): The name of the character's house, or None.
+        strength_description (str): The description of the character's strength, or None.
+        The remaining attributes mirror Character.
+    """
+    __tablename__ = "character_read"
+
+    # Same filter/sort indexes as the characters table (migration 0004), plus the inline house/strength columns
+    __table_args__ = (
+        db.Index("ix_character_read_name_id", "name", "id"),
+        db.Index("ix_character_read_house_name_id", "house_name", "id"),
+        db.Index("ix_character_read_strength_description_id", "strength_description", "id"),
+        db.Index("ix_character_read_house_id_name_id", "house_id", "name", "id"),
+        db.Index("ix_character_read_strength_id_name_id", "strength_id", "name", "id"),
+        db.Index("ix_character_read_age_id", "age", "id"),
+        db.Index("ix_character_read_role_id", "role", "id"),
+        db.Index("ix_character_read_nickname_id", "nickname", "id"),
+        db.Index("ix_character_read_animal_id", "animal", "id"),
+        db.Index("ix_character_read_symbol_id", "symbol", "id"),
+        db.Index("ix_character_read_death_id", "death", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(100), nullable=False)
+    house_id = db.Column(db.Integer, nullable=True)
+    house_name = db.Column(db.String(50), nullable=True)
+    animal = db.Column(db.String(50), nullable=True)
+    symbol = db.Column(db.String(50), nullable=True)
+    nickname = db.Column(db.String(50), nullable=True)
+    role = db.Column(db.String(100), nullable=False)
+    age = db.Column(db.Integer, nullable=True)
+    death = db.Column(db.Integer, nullable=True)
+    strength_id = db.Column(db.Integer, nullable=True)
+    strength_description = db.Column(db.String(50), nullable=True)
+
+    def __repr__(self):
+        return f"<CharacterRead {self.name}>"
+
+
+class DatasetGeneration(db.Model):
+    """
+    Counter that advances whenever a dataset changes, used to build the ETags of listings without reading them.
+    The "characters" generation is advanced by app.utils.read_model with every write to characters, houses
+    or strengths, in the same transaction as the write.
+
+    Attributes:
+        name (str): The dataset, e.g. "characters".
+        generation (int): The number of changes committed to the dataset.
+    """
+    __tablename__ = "dataset_generations"
+
+    name = db.Column(db.String(50), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DatasetGeneration {self.name}={self.generation}>"
@@ -1,14 +1,42 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from pydantic import ValidationError
 from app import db, handle_404, handle_sqlalchemy_error, handle_500, handle_validation_error
 from app.models.character_model import Character
-from app.schemas.character_schema import CharacterCreateSchema, CharacterUpdateSchema
-from app.services.character_db_service import list_characters
+from app.schemas.character_schema import (
+    CharacterCreateSchema,
+    CharacterUpdateSchema,
+    character_bulk_update_list_adapter,
+    character_create_list_adapter,
+    character_id_list_adapter
+)
+from app.services.character_db_service import delete_character_db, list_characters, update_character_db
+from app.services.character_bulk_service import (
+    bulk_create_characters,
+    bulk_delete_characters,
+    bulk_update_characters
+)
+from app.utils.bulk import bulk_results, get_atomic_param, get_bulk_items, validate_items
 from app.utils.filters import get_filter_params
-from app.utils.pagination import get_pagination_params
+from app.utils.fieldsets import get_fieldset_params
+from app.utils.pagination import get_pagination_params, get_cursor_param, get_count_mode
 from app.utils.sorting import get_sorting_params
+from app.utils.search import get_search_param
+from app.utils.dimensions import dimension_cache
+from app.utils.serialization import serialize_character
+from app.utils.response_cache import response_cache
+from app.utils.etags import (
+    character_etag,
+    dataset_generation,
+    get_character_version,
+    if_match_versions,
+    is_not_modified,
+    listing_etag,
+    not_modified,
+    precondition_failed,
+    with_etag
+)
 
 
 characters_db_bp = Blueprint("characters_db", __name__)
@@ -23,18 +51,47 @@ def get_character_list():
     try:
         filters = get_filter_params()
 
+        # Free-text search (q=), ranked by relevance unless sort_by is given
+        search = get_search_param()
+        if search:
+            filters["q"] = search
+
         # Apply sorting
-        sort_by, sort_order = get_sorting_params()
+        sort_by, sort_order = get_sorting_params(search)
 
-        # Apply pagination
+        # Apply pagination (offset with skip, or keyset with the `after` cursor of the previous page)
         limit, skip = get_pagination_params()
+        after = get_cursor_param(sort_by, sort_order)
+
+        # How `total` is computed: exact (default), estimate or none
+        count_mode = get_count_mode()
+
+        # Sparse fieldsets (fields=id,name,house / include=house,strength), None returns full characters
+        fields = get_fieldset_params()
+
+        params = dict(filters=filters, sort=[sort_by, sort_order], limit=limit, skip=skip, after=after,
+                      count=count_mode, fields=fields)
+
+        # The ETag only depends on the dataset generation and the parameters, so an unchanged page is answered
+        # with 304 before anything is fetched or serialized
+        generation = dataset_generation()
+        etag = listing_etag(generation, **params)
+        if is_not_modified(etag):
+            return not_modified(etag)
+
+        # Repeated listings are served from the response cache (random samples are never cached), keyed by the
+        # same generation as the ETag so a cached body always matches it
+        cache_key = response_cache.key("db", generation, **params)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return with_etag(cached, etag)
 
-        result = list_characters(filters, sort_by, sort_order, limit, skip)
+        result = list_characters(filters, sort_by, sort_order, limit, skip, after, count_mode, fields, generation)
 
         if "error" in result:
             return jsonify({"message": result["error"]}), 500
 
-        return jsonify(result), 200
+        return with_etag(response_cache.set(cache_key, jsonify(result)), etag), 200
 
     except ValueError as e:
         return jsonify({"message": str(e)}), 400
@@ -59,11 +116,21 @@ def create_character_for_db():
         character = Character(**character_data.dict())
 
         db.session.add(character)
+        db.session.flush()
+
+        # Validated before the commit, so a character the response can't describe (e.g. an unknown strength_id
+        # where foreign keys aren't enforced) is rolled back instead of stored and reported as a failure.
+        # House and strength come from the dimension cache
+        body = serialize_character(dimension_cache.character_dict(character))
+        etag = character_etag(character.id, character.version)
+
         db.session.commit()
+        response_cache.invalidate("db")
 
-        return jsonify({"message": "Character created successfully", "character": character.to_dict()}), 201
+        return with_etag(jsonify({"message": "Character created successfully", "character": body}), etag), 201
 
     except ValidationError as ve:
+        db.session.rollback()
         return handle_validation_error(ve)
 
     except SQLAlchemyError as db_error:
@@ -75,6 +142,67 @@ def create_character_for_db():
         return handle_500(e)
 
 
+def character_write_failed(character_id, versions):
+    """
+    Response of a PATCH/DELETE that matched no row: 412 if the character exists but If-Match named another
+    version, 404 otherwise.
+    """
+    if versions is not None and get_character_version(character_id) is not None:
+        return precondition_failed()
+    return handle_404("Character not found")
+
+
+# Item schema (as a list adapter) and service of each bulk method
+BULK_OPERATIONS = {
+    "POST": (character_create_list_adapter, bulk_create_characters),
+    "PATCH": (character_bulk_update_list_adapter, bulk_update_characters),
+    "DELETE": (character_id_list_adapter, bulk_delete_characters),
+}
+
+
+@characters_db_bp.route('/characters/bulk', methods=['POST', 'PATCH', 'DELETE'])
+@jwt_required()
+def bulk_characters_db():
+    """
+    Creates (POST), updates (PATCH) or deletes (DELETE) many characters in one request and one transaction.
+    - POST: an array of characters, as for POST /character.
+    - PATCH: an array of {"id": ..., <fields to change>}.
+    - DELETE: an array of character IDs.
+
+    The whole array is validated in one pass and stored with batched statements. Every item gets a result
+    (its index, status and id, or its errors). With atomic=true (default BULK_ATOMIC) nothing is stored when
+    any item fails (400), with atomic=false the valid items are stored and the response is 207 if some failed.
+    """
+    try:
+        items = get_bulk_items()
+        atomic = get_atomic_param()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    adapter, apply_items = BULK_OPERATIONS[request.method]
+    try:
+        valid, errors = validate_items(adapter, items)
+        succeeded, applied = apply_items(valid, errors, atomic)
+        if applied:
+            response_cache.invalidate("db")
+
+        body, status = bulk_results(succeeded, errors, applied)
+        return jsonify(body), status
+
+    except IntegrityError:
+        # A concurrent write took a name or removed a reference after the checks, the batch was rolled back
+        db.session.rollback()
+        return jsonify({"message": "The batch conflicts with a concurrent change, nothing was applied."}), 409
+
+    except SQLAlchemyError as db_error:
+        db.session.rollback()
+        return handle_sqlalchemy_error(db_error)
+
+    except Exception as e:
+        db.session.rollback()
+        return handle_500(e)
+
+
 @characters_db_bp.route('/characters/<int:character_id>', methods=['GET', 'PATCH', 'DELETE'])
 @jwt_required()
 def handle_character_db(character_id):
@@ -83,46 +211,67 @@ def handle_character_db(character_id):
     - GET: Returns the character details.
     - PATCH: Partially updates character fields, validates the request payload before updating the character.
     - DELETE: Removes the character from the database.
-    """
-    character = Character.query.get(character_id)
-    if not character:
-        return handle_404("Character not found")
 
+    Responses carry the character's ETag (its row version). GET answers a matching If-None-Match with 304
+    after reading only the version. PATCH and DELETE are single UPDATE/DELETE ... RETURNING statements,
+    with If-Match the expected version is part of the statement's WHERE clause, so a character changed
+    since the client fetched it is never overwritten (412).
+    """
     if request.method == 'GET':
-        return jsonify(character.to_dict()), 200
+        if request.if_none_match:
+            version = get_character_version(character_id)
+            if version is None:
+                return handle_404("Character not found")
+            etag = character_etag(character_id, version)
+            if is_not_modified(etag):
+                return not_modified(etag)
+
+        # A primary key lookup, house and strength come from the dimension cache instead of a join. The cache's
+        # generation is checked first: a rename gives the character a new version (and ETag), the body sent
+        # under it must not carry the old name for up to DIMENSION_CACHE_TTL
+        character = db.session.get(Character, character_id)
+        if not character:
+            return handle_404("Character not found")
+
+        body = serialize_character(dimension_cache.character_dict(character, check=True))
+        return with_etag(jsonify(body), character_etag(character_id, character.version)), 200
+
+    versions = if_match_versions(character_id)
     try:
         if request.method == 'PATCH':
             data = request.get_json()
             if not data:
                 return jsonify({"message": "No data provided"}), 400
 
-            # Validate and update character fields dynamically using Pydantic schema
-            # **data means we are passing data as keyword arguments (key=value)
-            # .dict(exclude_unset=True → only update provided fields, not overwrite existing values
+            # Validate the payload using the Pydantic schema
+            # .dict(exclude_unset=True) → only update provided fields, not overwrite existing values
             validated_data = CharacterUpdateSchema(**data).dict(exclude_unset=True)
 
-            # Update character fields dynamically
-            for key, value in validated_data.items():
-                # Loops through data (the user’s input).
-                # Updates each field dynamically in the character object.
-                setattr(character, key, value)  # no need for if "animal" in data: character.animal = data["animal"]
+            # One UPDATE ... RETURNING writes the fields and returns the character with its house and strength
+            character, version = update_character_db(character_id, validated_data, versions)
+            if character is None:
+                return character_write_failed(character_id, versions)
+            response_cache.invalidate("db")
 
-            db.session.commit()
-
-            return jsonify({
+            return with_etag(jsonify({
                 "message": "Voilà! Character updated successfully",
-                "character": character.to_dict()
-            }), 200
+                "character": character
+            }), character_etag(character_id, version)), 200
 
         elif request.method == 'DELETE':
-            db.session.delete(character)
-            db.session.commit()
+            if not delete_character_db(character_id, versions):
+                return character_write_failed(character_id, versions)
+            response_cache.invalidate("db")
 
             return jsonify({"message": "Character deleted successfully."}), 200
 
     except ValidationError as ve:
+        db.session.rollback()
         return handle_validation_error(ve)
 
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
     except SQLAlchemyError as db_error:
         db.session.rollback()
         return handle_sqlalchemy_error(db_error)
@@ -3,9 +3,29 @@ from pydantic import ValidationError
 from app import handle_500, handle_validation_error
 from flask_jwt_extended import jwt_required
 from app.schemas.character_schema import CharacterJSONSchema
-from app.utils.json_utils import load_characters, save_and_respond
-from app.services.character_json_service import add_character, show_characters_json
+from app.services.character_json_service import (
+    add_character,
+    delete_character_json,
+    get_character_json,
+    get_character_json_etag,
+    get_json_version,
+    show_characters_json,
+    update_character_json
+)
+from app.utils.filters import get_filter_params
+from app.utils.fieldsets import get_fieldset_params
 from app.utils.pagination import get_pagination_params
+from app.utils.sorting import get_sorting_params
+from app.utils.response_cache import response_cache
+from app.utils.etags import (
+    is_not_modified,
+    is_precondition_failed,
+    listing_etag,
+    not_modified,
+    precondition_failed,
+    with_etag
+)
+from app.utils.json_store import PreconditionFailedError
 
 
 # Create a Blueprint for character-related routes
@@ -16,29 +36,50 @@ characters_json_bp = Blueprint("characters", __name__)
 def list_characters_json():
     """
     Fetch characters from JSON with optional filtering, sorting, and pagination.
-    Convert query parameters to a dictionary (filters).
+    Extract and validate filters (name, house, strength, animal, role, age ranges, ids).
     Extract sorting fields (sort_by, sort_order).
     Extract pagination fields (limit, skip).
-    Remaining filters are used for filtering characters dynamically.
 
     Example Request:
     GET /characters/json?house=Lannister&sort_by=name&limit=5
     """
-    # Get query parameters for filtering, sorting, and pagination
-    filters = request.args.to_dict()
-    sort_by = filters.pop("sort_by", None)
-    sort_order = filters.pop("sort_order", "asc")
+    try:
+        # Get query parameters for filtering, sorting, and pagination (same vocabulary as the database routes)
+        filters = get_filter_params()
+        sort_by, sort_order = get_sorting_params()
+
+        # Extract pagination parameters (returns "random" if both are missing)
+        limit, skip = get_pagination_params()
+
+        # Sparse fieldsets, same vocabulary as /characters/list
+        fields = get_fieldset_params()
+
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
 
-    # Extract pagination parameters (returns "random" if both are missing)
-    limit, skip = get_pagination_params()
+    params = dict(filters=filters, sort=[sort_by, sort_order], limit=limit, skip=skip, fields=fields)
 
-    result = show_characters_json(filters, sort_by, sort_order, limit, skip)
+    # Unchanged pages (same store version and parameters) are answered with 304 before the query engine runs
+    version = get_json_version()
+    etag = listing_etag(version, **params)
+    if is_not_modified(etag):
+        return not_modified(etag)
+
+    # Repeated listings are served from the response cache (random samples are never cached), keyed by the
+    # same store version as the ETag so a cached body always matches it
+    cache_key = response_cache.key("json", version, **params)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return with_etag(cached, etag)
+
+    result = show_characters_json(filters, sort_by, sort_order, limit, skip, fields)
 
     # Check if the result contains an error (by checking if it is a dictionary and contains the 'error' key)
     if isinstance(result, dict) and "error" in result:
         return jsonify({"error": result["error"]}), 400
 
-    return jsonify(result), 200
+    # The page is encoded once and kept whole in the response cache
+    return with_etag(response_cache.set(cache_key, jsonify(result)), etag), 200
 
 
 @characters_json_bp.route('/character/json', methods=['POST'])
@@ -47,9 +88,8 @@ def create_character():
     """
     Endpoint to create a new character and store it in 'characters.json'.
     Check if data is valid (Pydantic schema validation).
-    Load existing characters from the 'characters.json' file.
-    Add the new character to the in-memory list.
-    Save the updated list back to the 'characters.json' file.
+    Add the new character to the store under the next ID of its persistent sequence.
+    Save the change back to the 'characters.json' file.
     Return success response.
     Consideration: The data is lost if the server is restarted. For more permanent storage, switch to a database.
     """
@@ -63,6 +103,7 @@ def create_character():
         # Use Pydantic to validate the incoming character data
         validated_data = CharacterJSONSchema(**data).dict()
         new_character = add_character(validated_data)
+        response_cache.invalidate("json")
 
         return jsonify({"message": "Character created successfully", "character": new_character}), 201
 
@@ -78,22 +119,26 @@ def create_character():
 def handle_character_json(character_id):
     """
     Handles fetching (GET), updating (PATCH), and deleting (DELETE) a character by ID in the JSON file.
+    Responses carry the character's ETag (a hash of its JSON): GET answers a matching If-None-Match with 304,
+    PATCH and DELETE answer 412 when If-Match no longer matches the stored character.
     """
-    characters = load_characters()
+    # O(1) lookup in the store's id index instead of scanning every character
+    etag = get_character_json_etag(character_id)
+    if etag is None:
+        return jsonify({"message": "Character not found"}), 404
 
-    # character = next((char for char in characters if char["id"] == character_id), None)
-    character = None
-    for char in characters:
-        if char["id"] == character_id:
-            character = char
-            break
+    if request.method == 'GET' and is_not_modified(etag):
+        return not_modified(etag)
+    if request.method != 'GET' and is_precondition_failed(etag):
+        return precondition_failed()
 
+    character = get_character_json(character_id)
     if not character:
         return jsonify({"message": "Character not found"}), 404
 
     try:
         if request.method == 'GET':
-            return jsonify(character), 200
+            return with_etag(jsonify(character), etag), 200
 
         if request.method == 'PATCH':
             data = request.get_json()
@@ -103,20 +148,30 @@ def handle_character_json(character_id):
             # Validate and update character fields dynamically using Pydantic schema
             validated_data = CharacterJSONSchema(**{**character, **data}).dict(exclude_unset=True)
 
-            # Update the character in the list
-            for key, value in validated_data.items():
-                character[key] = value
+            # Only store the fields sent by the client, so concurrent updates of other fields are kept
+            changes = {key: value for key, value in validated_data.items() if key in data}
+            # If-Match is checked again inside the store's write, against the character being replaced
+            character, etag = update_character_json(character_id, changes, request.if_match)
+            if not character:
+                return jsonify({"message": "Character not found"}), 404
+            response_cache.invalidate("json")
 
-            return save_and_respond("Voilà! Character updated successfully", characters, character)
+            return with_etag(
+                jsonify({"message": "Voilà! Character updated successfully", "character": character}), etag
+            ), 200
 
         elif request.method == 'DELETE':
-            # Creates a new list excluding the character with character_id
-            characters = [char for char in characters if char["id"] != character_id]
+            if not delete_character_json(character_id, request.if_match):
+                return jsonify({"message": "Character not found"}), 404
+            response_cache.invalidate("json")
 
-            return save_and_respond("Character deleted successfully from JSON.", characters)
+            return jsonify({"message": "Character deleted successfully from JSON."}), 200
 
     except ValidationError as ve:
         return handle_validation_error(ve)
 
+    except PreconditionFailedError:
+        return precondition_failed()
+
     except Exception as e:
         return handle_500(e)
@@ -1,5 +1,9 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
+from typing import Annotated, Optional, Union
+
+
+# Largest value of an INTEGER column, upper bound of the numeric fields clients send
+MAX_INTEGER = 2 ** 31 - 1
 
 
 class HouseCreateSchema(BaseModel):
@@ -13,6 +17,8 @@ class HouseResponseSchema(BaseModel):
     """
     Schema for returning house details with ID and name.
     """
+    model_config = ConfigDict(from_attributes=True)  # Can be validated straight from a House object
+
     id: int
     name: str = Field(..., max_length=50)
 
@@ -28,6 +34,8 @@ class StrengthResponseSchema(BaseModel):
     """
     Schema for returning strength details with ID and description.
     """
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     description: str = Field(..., max_length=50)
 
@@ -42,19 +50,28 @@ class CharacterCreateSchema(BaseModel):
     symbol: Optional[str] = Field(None, max_length=50)
     nickname: Optional[str] = Field(None, max_length=50)
     role: str = Field(..., max_length=100)
-    age: Optional[int] = Field(None, ge=0)  # Age must be >= 0, can be null
-    death: Optional[int] = Field(None, ge=0)  # Death (year) must be >= 0
+    age: Optional[int] = Field(None, ge=0, le=MAX_INTEGER)  # Age must be >= 0, can be null
+    death: Optional[int] = Field(None, ge=0, le=MAX_INTEGER)  # Death (year) must be >= 0
     strength_id: int = Field(..., ge=1)  # Reference to Strength ID
 
 
+class EmptySchema(BaseModel):
+    """
+    Serialized as an empty object, returned instead of null for a character without a house (see Character.to_dict).
+    """
+
+
 # Schema for returning a character (Includes ID + full house and strength details)
 class CharacterResponseSchema(BaseModel):
     """
     Schema for returning a character's details, including full house and strength info.
+    Validates straight from a Character object (from_attributes), house and strength included.
     """
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
-    house: Optional[HouseResponseSchema] = None
+    house: Union[HouseResponseSchema, EmptySchema] = EmptySchema()
     animal: Optional[str] = None
     symbol: Optional[str] = None
     nickname: Optional[str] = None
@@ -63,6 +80,16 @@ class CharacterResponseSchema(BaseModel):
     death: Optional[int] = None
     strength: StrengthResponseSchema
 
+    @field_validator("house", mode="before")
+    @classmethod
+    def no_house_as_empty(cls, value):
+        return EmptySchema() if value is None else value
+
+
+# Compiled once, used to validate characters from ORM objects and serialize them in pydantic-core
+character_response_adapter = TypeAdapter(CharacterResponseSchema)
+character_list_response_adapter = TypeAdapter(list[CharacterResponseSchema])
+
 
 class CharacterUpdateSchema(BaseModel):
     """
@@ -74,14 +101,31 @@ class CharacterUpdateSchema(BaseModel):
     symbol: Optional[str] = Field(None, max_length=50)
     nickname: Optional[str] = Field(None, max_length=50)
     role: Optional[str] = Field(None, max_length=100)
-    age: Optional[int] = Field(None, ge=0)
-    death: Optional[int] = Field(None, ge=0)
+    age: Optional[int] = Field(None, ge=0, le=MAX_INTEGER)
+    death: Optional[int] = Field(None, ge=0, le=MAX_INTEGER)
     strength_id: Optional[int] = Field(None, ge=1)
 
     class Config:
         extra = "forbid"  # Prevents users from sending unexpected fields
 
 
+# Fields a character can't be without (CharacterUpdateSchema accepts null for every field)
+REQUIRED_FIELDS = ("name", "role", "strength_id")
+
+
+class CharacterBulkUpdateSchema(CharacterUpdateSchema):
+    """
+    Schema for one item of a bulk update: the ID of the character plus the fields to change.
+    """
+    id: int = Field(..., ge=1)
+
+
+# Validate a whole array of a bulk request in one call (see app/utils/bulk.py)
+character_create_list_adapter = TypeAdapter(list[CharacterCreateSchema])
+character_bulk_update_list_adapter = TypeAdapter(list[CharacterBulkUpdateSchema])
+character_id_list_adapter = TypeAdapter(list[Annotated[int, Field(ge=1)]])
+
+
 class CharacterJSONSchema(BaseModel):
     """
     Schema for accepting character data in JSON format (without ID and full details).
@@ -92,6 +136,6 @@ class CharacterJSONSchema(BaseModel):
     symbol: Optional[str]
     nickname: Optional[str]
     role: Optional[str]
-    age: Optional[int]
-    death: Optional[int]
+    age: Optional[int] = Field(..., ge=0, le=MAX_INTEGER)
+    death: Optional[int] = Field(..., ge=0, le=MAX_INTEGER)
     strength: Optional[str]
@@ -0,0 +1,161 @@
+from collections import Counter, defaultdict
+from sqlalchemy import bindparam, delete, insert, select, update
+from app import db
+from app.models.character_model import Character, House, Strength
+from app.schemas.character_schema import REQUIRED_FIELDS
+from app.utils.bulk import item_error
+from app.utils.read_model import REFRESH_BATCH_SIZE, refresh_read_rows
+
+
+def _batches(values):
+    values = list(values)
+    for start in range(0, len(values), REFRESH_BATCH_SIZE):
+        yield values[start:start + REFRESH_BATCH_SIZE]
+
+
+def _select_in(columns, key, values):
+    """
+    Returns the rows of `columns` whose `key` is one of `values`, queried in IN batches.
+    """
+    rows = []
+    for batch in _batches(set(values)):
+        rows += db.session.execute(select(*columns).where(key.in_(batch))).all()
+    return rows
+
+
+def _existing_ids(column, values):
+    return {row[0] for row in _select_in([column], column, values)}
+
+
+def _check_references(rows, errors):
+    """
+    Fails the items whose house_id or strength_id doesn't exist (not every database enforces foreign keys).
+    `rows` maps item indexes to the values to store.
+    """
+    house_ids = _existing_ids(House.id, [row["house_id"] for row in rows.values() if row.get("house_id") is not None])
+    strength_ids = _existing_ids(
+        Strength.id, [row["strength_id"] for row in rows.values() if row.get("strength_id") is not None]
+    )
+    for index, row in rows.items():
+        if row.get("house_id") is not None and row["house_id"] not in house_ids:
+            errors[index] = item_error(400, "Unknown house_id", "house_id")
+        elif row.get("strength_id") is not None and row["strength_id"] not in strength_ids:
+            errors[index] = item_error(400, "Unknown strength_id", "strength_id")
+
+
+def _check_names(rows, errors, ids=None):
+    """
+    Fails the items whose name is used by another character, or by another item of the same request.
+    `ids` maps item indexes to the id of the character they update (None for new characters).
+    """
+    ids = ids or {}
+    named = {index: row["name"] for index, row in rows.items() if row.get("name") is not None and index not in errors}
+    owners = dict(_select_in([Character.name, Character.id], Character.name, named.values()))
+    repeated = Counter(named.values())
+    for index, name in named.items():
+        if repeated[name] > 1:
+            errors[index] = item_error(409, "Name used by more than one item of the request", "name")
+        elif name in owners and owners[name] != ids.get(index):
+            errors[index] = item_error(409, "A character with this name already exists", "name")
+
+
+def _finish(changed_ids):
+    """
+    Brings character_read up to date with the statements run on characters (they bypass the session's
+    after_flush sync) and commits the batch.
+    """
+    changed_ids = list(changed_ids)
+    if changed_ids:
+        refresh_read_rows(db.session.connection(), changed_ids)
+    db.session.commit()
+
+
+def bulk_create_characters(valid, errors, atomic):
+    """
+    Inserts the validated characters (`valid`: (index, CharacterCreateSchema) pairs) with one executemany
+    INSERT ... RETURNING id. Items with unknown houses/strengths or taken names are added to `errors`.
+    With `atomic`, nothing is stored if any item failed.
+    Returns (results of the stored items, whether anything was applied).
+    """
+    rows = {index: character.model_dump() for index, character in valid}
+    _check_references(rows, errors)
+    _check_names(rows, errors)
+    rows = {index: row for index, row in rows.items() if index not in errors}
+    if errors and atomic:
+        return [{"index": index, "status": 201} for index in rows], False
+
+    ids = []
+    if rows:
+        statement = insert(Character).returning(Character.id, sort_by_parameter_order=True)
+        ids = db.session.scalars(statement, list(rows.values())).all()
+    _finish(ids)
+    return [{"index": index, "status": 201, "id": character_id} for index, character_id in zip(rows, ids)], True
+
+
+def bulk_update_characters(valid, errors, atomic):
+    """
+    Applies the validated changes (`valid`: (index, CharacterBulkUpdateSchema) pairs, only the fields sent are
+    changed). Items changing the same fields are updated together by one executemany UPDATE ... WHERE id = ?,
+    which also increments the version of every updated character.
+    Unknown ids, ids sent twice, conflicting names and unknown references fail their item.
+    With `atomic`, nothing is stored if any item failed.
+    Returns (results of the stored items, whether anything was applied).
+    """
+    ids = {index: item.id for index, item in valid}
+    rows = {index: item.model_dump(exclude_unset=True, exclude={"id"}) for index, item in valid}
+
+    existing = _existing_ids(Character.id, ids.values())
+    repeated = Counter(ids.values())
+    for index, character_id in ids.items():
+        if character_id not in existing:
+            errors[index] = item_error(404, "Character not found", "id")
+        elif repeated[character_id] > 1:
+            errors[index] = item_error(400, "Character updated by more than one item of the request", "id")
+        else:
+            missing = [field for field in REQUIRED_FIELDS if field in rows[index] and rows[index][field] is None]
+            if missing:
+                errors[index] = item_error(400, "Field can't be null", missing[0])
+    _check_references({index: row for index, row in rows.items() if index not in errors}, errors)
+    _check_names(rows, errors, ids)
+    rows = {index: row for index, row in rows.items() if index not in errors}
+    if errors and atomic:
+        return [{"index": index, "status": 200, "id": ids[index]} for index in rows], False
+
+    # One executemany per set of changed fields, bound parameters are prefixed so they don't clash with columns
+    groups = defaultdict(list)
+    for index, row in rows.items():
+        if row:
+            params = {f"new_{field}": value for field, value in row.items()}
+            groups[tuple(sorted(row))].append({"_id": ids[index], **params})
+    characters = Character.__table__
+    for fields, params in groups.items():
+        values = {field: bindparam(f"new_{field}") for field in fields}
+        statement = update(characters).where(characters.c.id == bindparam("_id")).values(
+            **values, version=characters.c.version + 1
+        )
+        db.session.execute(statement, params)
+
+    _finish(param["_id"] for params in groups.values() for param in params)
+    return [{"index": index, "status": 200, "id": ids[index]} for index in rows], True
+
+
+def bulk_delete_characters(valid, errors, atomic):
+    """
+    Deletes the characters with the validated ids (`valid`: (index, id) pairs) with batched DELETE ... WHERE id IN.
+    Unknown ids fail their item. With `atomic`, nothing is deleted if any item failed.
+    Returns (results of the deleted items, whether anything was applied).
+    """
+    existing = _existing_ids(Character.id, [character_id for _, character_id in valid])
+    for index, character_id in valid:
+        if character_id not in existing:
+            errors[index] = item_error(404, "Character not found", "id")
+    ids = {index: character_id for index, character_id in valid if index not in errors}
+    if errors and atomic:
+        return [{"index": index, "status": 200, "id": character_id} for index, character_id in ids.items()], False
+
+    characters = Character.__table__
+    for batch in _batches(set(ids.values())):
+        db.session.execute(delete(characters).where(characters.c.id.in_(batch)))
+
+    _finish(ids.values())
+    return [{"index": index, "status": 200, "id": character_id} for index, character_id in ids.items()], True
@@ -1,72 +1,274 @@
-from sqlalchemy import func
-from app.models.character_model import Character
+from sqlalchemy import delete, func, select, update
+from app.models.character_model import Character, CharacterRead, House, Strength
 from app.utils.filters import apply_filters
-from app.utils.sorting import apply_sorting
-from app.utils.db_utils import safe_commit, get_total_count
+from app.utils.sorting import apply_sorting, apply_keyset_sorting, order_by_column, keyset_condition, SORT_COLUMNS
+from app.utils.search import search_rank
+from app.utils.serialization import serialize_character
+from app.schemas.character_schema import REQUIRED_FIELDS
+from app.utils.pagination import encode_cursor
+from app.utils.sampling import sample_query
+from app.utils.fieldsets import CHARACTER_RESPONSE_FIELDS, FULL_CHARACTER_FIELDS
+from app.utils.db_utils import (
+    get_filtered_count,
+    estimate_count
+)
+from app.utils.etags import dataset_generation
+from app.utils.read_model import remove_read_rows, write_read_row
+from app.utils.response_cache import normalize_params
+from app.utils.single_flight import SingleFlight
+from app.config import Config
 from sqlalchemy.exc import SQLAlchemyError
 from app import handle_sqlalchemy_error, db
 
 
-def list_characters(filters, sort_by, sort_order, limit, skip):
+# Identical listings requested at the same time share one query (see list_characters)
+list_flights = SingleFlight(timeout=Config.LIST_COALESCE_TIMEOUT)
+
+
+# Columns of the character_read table that can be selected on their own with `fields`
+CHARACTER_COLUMNS = {
+    "id": CharacterRead.id,
+    "name": CharacterRead.name,
+    "animal": CharacterRead.animal,
+    "symbol": CharacterRead.symbol,
+    "nickname": CharacterRead.nickname,
+    "role": CharacterRead.role,
+    "age": CharacterRead.age,
+    "death": CharacterRead.death,
+    "house_id": CharacterRead.house_id,
+    "strength_id": CharacterRead.strength_id
+}
+
+
+def build_fieldset_query(fields):
+    """
+    Builds the base query for a sparse fieldset: only the requested columns of character_read are selected
+    (house and strength are inline columns, so no join is needed).
+    Returns the query and a function turning one result row into the response dict.
+    """
+    columns = [
+        CHARACTER_COLUMNS[field].label(field) for field in CHARACTER_RESPONSE_FIELDS
+        if field in fields and field in CHARACTER_COLUMNS
+    ]
+    if "house" in fields:
+        columns += [CharacterRead.house_id.label("house__id"), CharacterRead.house_name.label("house__name")]
+    if "strength" in fields:
+        columns += [
+            CharacterRead.strength_id.label("strength__id"),
+            CharacterRead.strength_description.label("strength__description")
+        ]
+
+    query = CharacterRead.query.with_entities(*columns)
+
+    # Positions of the selected columns, rows are read by index (sort value and total come after them)
+    names = [column.name for column in columns]
+    plain = [(name, index) for index, name in enumerate(names) if "__" not in name]
+    house = (names.index("house__id"), names.index("house__name")) if "house" in fields else None
+    strength = (names.index("strength__id"), names.index("strength__description")) if "strength" in fields else None
+
+    def serialize(row):
+        data = {name: row[index] for name, index in plain}
+        if house:
+            data["house"] = {"id": row[house[0]], "name": row[house[1]]} if row[house[1]] is not None else {}
+        if strength:
+            data["strength"] = {"id": row[strength[0]], "description": row[strength[1]]} \
+                if row[strength[1]] is not None else {}
+        return data
+
+    return query, serialize
+
+
+def list_characters(filters, sort_by, sort_order, limit, skip, after=None, count_mode="exact", fields=None,
+                    generation=None):
+    """
+    Fetch characters from the database with filtering, sorting, and pagination (see query_characters).
+
+    Concurrent calls with the same parameters are coalesced: one of them runs the query and the others wait
+    for it (at most LIST_COALESCE_TIMEOUT seconds) and share its result, so a burst of identical requests,
+    e.g. when a popular page drops out of the response cache, costs one query instead of one per request.
+    The key includes the dataset generation (`generation`, read here if the caller doesn't pass the one it
+    already has), so a call never joins a query that started before the last committed write.
+    Random samples are not coalesced.
+    """
+    if generation is None:
+        generation = dataset_generation()
+    if limit == "random":
+        return query_characters(filters, sort_by, sort_order, limit, skip, after, count_mode, fields, generation)
+
+    key = normalize_params(dict(generation=generation, filters=filters, sort=[sort_by, sort_order],
+                                limit=limit, skip=skip, after=after, count=count_mode, fields=fields))
+    return list_flights.do(
+        key, lambda: query_characters(filters, sort_by, sort_order, limit, skip, after, count_mode, fields, generation)
+    )
+
+
+def query_characters(filters, sort_by, sort_order, limit, skip, after=None, count_mode="exact", fields=None,
+                     generation=None):
     """
     Fetch characters from the database with filtering, sorting, and pagination.
     Returns both count (paginated result) & total (unpaginated count).
+
+    Pages are selected either by offset (`skip`) or, when `after` holds the (sort value, id) of the last row
+    of the previous page, by keyset: the query seeks directly past that row, so deep pages cost the same as
+    the first one. Sorted pages include `next_cursor`, to be passed as `after` to fetch the next page.
+
+    `total` counts the filtered rows. With count_mode "exact" it is computed by a window function in the same
+    query as the page (keyset pages, which don't see the rows before the cursor, use a short-lived cached count),
+    "estimate" uses the planner's estimate, and "none" skips counting.
+
+    With a free-text search (filters["q"]), sort_by "relevance" orders by the search index's rank.
+
+    `fields` (a set, see get_fieldset_params) narrows the response and the SELECT to the requested columns.
+    `generation` (the dataset generation, if the caller has read it) keys the cached counts.
     """
     try:
-        start_query = Character.query
+        # Listings read the character_read table, which carries house and strength inline (no joins).
+        # Full characters are selected like a fieldset of all fields: rows come back as plain tuples that are
+        # shaped into dicts directly, without building ORM objects first
+        start_query, serialize = build_fieldset_query(FULL_CHARACTER_FIELDS if fields is None else fields)
 
         # Apply filters dynamically to query
         query = apply_filters(start_query, filters)
 
-        # Get total count *before* pagination
-        total_count = get_total_count(Character)
+        # Total number of filtered rows, counted alongside the page by a window function (before LIMIT applies)
+        window_total = func.count().over().label("total_count")
+        count_in_query = count_mode == "exact" and after is None
 
         # Apply sorting (unless using random)
         if limit == "random":
-            query = query.order_by(func.random()).limit(20)  # Select 20 random rows
-            characters = query.all()
+            # Select 20 random rows by probing random ids, instead of sorting the whole table by random()
+            count_query = query
+            count_in_query = False
+            if count_mode == "exact":
+                population = get_filtered_count(query, filters, generation)
+            else:
+                population = estimate_count(query, filters, generation)
+            characters = sample_query(query, 20, population)
+        elif sort_by == "relevance":
+            # Free-text search results, ordered by the search index's rank (filters["q"] is set with this sort)
+            sort_column = search_rank(filters["q"])
+            count_query = query
+            if after is not None:
+                query = query.filter(keyset_condition(sort_column, sort_order, after))
+            query = order_by_column(query, sort_column, sort_order)
+        else:
+            count_query = apply_sorting(query, sort_by, sort_order)
+            if after is not None:
+                query = apply_keyset_sorting(query, sort_by, sort_order, after)
+            else:
+                query = count_query
+            sort_column = SORT_COLUMNS.get(sort_by, CharacterRead.name)
+
+        if limit != "random":
+            # Fetch the sort value with each row for the cursor, and one extra row to know if there is a next page
+            query = query.add_columns(sort_column.label("sort_value"))
+            if count_in_query:
+                query = query.add_columns(window_total)
+            rows = query.offset(0 if after else skip).limit(limit + 1).all()
+            characters = rows[:limit]
+
+        # Get total count of the filtered rows *before* pagination
+        if limit == "random" and count_mode != "none":
+            total_count = population
+        elif count_mode == "none":
+            total_count = None
+        elif count_mode == "estimate":
+            total_count = estimate_count(count_query, filters, generation)
+        elif count_in_query and rows:
+            total_count = rows[0].total_count
+        elif count_in_query and not skip:
+            total_count = 0  # The first page is empty, so nothing matches
         else:
-            query = apply_sorting(query, sort_by, sort_order)
-            characters = query.offset(skip).limit(limit).all()
+            total_count = get_filtered_count(count_query, filters, generation)
 
-        return {
-                "characters": [character.to_dict() for character in characters],
+        result = {
+                "characters": [serialize(character) for character in characters],
                 "count": len(characters),  # Number of characters returned after pagination
-                "total": total_count  # Total number of characters before pagination
+                "total": total_count  # Number of filtered characters before pagination
                 }
 
+        if limit != "random":
+            last_row = rows[limit - 1] if len(rows) > limit else None
+            result["next_cursor"] = encode_cursor(sort_by, sort_order, last_row.sort_value, characters[-1].id) \
+                if last_row else None
+
+        return result
+
     except SQLAlchemyError as db_error:
         return handle_sqlalchemy_error(db_error)
 
 
-def create_character_db(character_data):
+def _returning_columns():
     """
-    Creates a new character in the database.
+    RETURNING columns of a character write: the row with its version, house name and strength description
+    (correlated subqueries, a LEFT JOIN is not possible in an UPDATE), i.e. everything the response and the
+    character_read row need.
     """
-    try:
-        character = Character(**character_data.dict())
-        db.session.add(character)
-        return safe_commit() or character.to_dict()
+    characters = Character.__table__
+    return [
+        *characters.c,
+        select(House.name).where(House.id == characters.c.house_id).scalar_subquery().label("house_name"),
+        select(Strength.description).where(Strength.id == characters.c.strength_id)
+        .scalar_subquery().label("strength_description"),
+    ]
 
-    except SQLAlchemyError as db_error:
-        return handle_sqlalchemy_error(db_error)
+
+def _character_from_row(row):
+    """
+    Shapes a RETURNING row into the dict serialize_character() validates.
+    """
+    character = dict(row._mapping)
+    character["house"] = {"id": row.house_id, "name": row.house_name} if row.house_name is not None else None
+    character["strength"] = {"id": row.strength_id, "description": row.strength_description}
+    return character
 
 
-def update_character_db(character, validated_data):
+def update_character_db(character_id, validated_data, versions=None):
     """
-    Updates a character in the database, only modifying fields that changed.
+    Updates the given fields of a character with a single UPDATE ... RETURNING that also increments its version
+    and returns the row with its house and strength, then stores the matching character_read row, validates the
+    response and commits (a ValidationError leaves the transaction open for the caller to roll back).
+    With `versions` (the versions the client's If-Match accepts), the row is only updated while its version
+    is one of them, so a concurrent change can't be overwritten.
+
+    Returns the updated character (response dict) and its new version, or (None, None) if no row matched
+    (the character doesn't exist, or its version didn't match). Raises ValueError for a null required field.
     """
-    updated_field = False  # Flag to track if any field is updated, no updates have been made yet
+    missing = [field for field in REQUIRED_FIELDS if field in validated_data and validated_data[field] is None]
+    if missing:
+        raise ValueError(f"{missing[0]} can't be null.")
+
+    characters = Character.__table__
+    statement = update(characters).where(characters.c.id == character_id)
+    if versions is not None:
+        statement = statement.where(characters.c.version.in_(versions))
+    statement = statement.values(**validated_data, version=characters.c.version + 1).returning(*_returning_columns())
 
-    for key, value in validated_data.items():
-        # Checks if the character object has the field named key
-        # Checks if the current value of that field is different from the new value
-        if hasattr(character, key) and getattr(character, key) != value:
-            # If the field exists and needs to be changed, update it with the new value
-            setattr(character, key, value)
-            updated_field = True  # Mark that an update occurred
+    row = db.session.execute(statement).one_or_none()
+    if row is None:
+        db.session.rollback()
+        return None, None
+
+    write_read_row(db.session.connection(), row._mapping)
+    character = serialize_character(_character_from_row(row))
+    db.session.commit()
+    return character, row.version
+
+
+def delete_character_db(character_id, versions=None):
+    """
+    Deletes a character with a single DELETE ... RETURNING, removes its character_read row and commits.
+    `versions` works as in update_character_db(). Returns False if no row matched.
+    """
+    characters = Character.__table__
+    statement = delete(characters).where(characters.c.id == character_id)
+    if versions is not None:
+        statement = statement.where(characters.c.version.in_(versions))
 
-    if updated_field:
-        return safe_commit() or character.to_dict()
+    if db.session.execute(statement.returning(characters.c.id)).scalar() is None:
+        db.session.rollback()
+        return False
 
-    return character.to_dict()
+    remove_read_rows(db.session.connection(), [character_id])
+    db.session.commit()
+    return True
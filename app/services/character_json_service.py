@@ -1,39 +1,34 @@
-from app.utils.json_utils import save_characters
-from app.utils.filters import apply_filters
-from app.utils.sorting import apply_sorting
-from app.utils.json_utils import load_characters
-import random
+from app.utils.etags import record_etag
+from app.utils.json_query import get_query_engine
+from app.utils.json_store import character_store
 
 
-def show_characters_json(filters, sort_by, sort_order, limit, skip):
+def show_characters_json(filters, sort_by, sort_order, limit, skip, fields=None):
     """
     Fetch characters from the JSON file with filtering, sorting, and pagination.
     Returns both count (paginated result) & total (unpaginated count).
+    Filtering and sorting run on the precomputed indexes of the in-memory query engine.
+    `fields` (a set, see get_fieldset_params) narrows the returned characters to the requested fields.
     """
     try:
-        characters = load_characters()
+        engine = get_query_engine()
 
         # Apply filters dynamically
-        filtered_characters = apply_filters(characters, filters)
+        matches = engine.search(filters)
 
         # Get total count before pagination
-        total_count = len(filtered_characters)
-
-        # Apply sorting
-        sorted_characters = apply_sorting(filtered_characters, sort_by, sort_order)
+        total_count = engine.count(matches)
 
         # Handle random selection if limit and skip are absent
         if limit == "random":
-            paginated_characters = random.sample(sorted_characters, min(20, len(sorted_characters)))
+            paginated_characters = engine.sample(matches, 20)
         else:
-            paginated_characters = sorted_characters[skip: skip + limit]   # This is Python's list slicing
-            # skip → The starting index (how many items to skip)
-            # skip + limit → The ending index (where to stop, exclusive)
-            # This technique prevents loading too much data at once by returning only a small portion of the full list
+            # Walks the presorted order of sort_by and stops once skip + limit matches are collected
+            paginated_characters = engine.page(matches, sort_by, sort_order, limit, skip)
 
-        # Return the result (paginated data + metadata)
+        # Return the result (paginated data + metadata), records only become dicts for the returned page
         return {
-            "characters": paginated_characters,
+            "characters": [character.to_dict(fields) for character in paginated_characters],
             "count": len(paginated_characters),  # Number of characters returned after pagination
             "total": total_count  # Total characters before pagination
         }
@@ -42,30 +37,60 @@ def show_characters_json(filters, sort_by, sort_order, limit, skip):
         return {"error": str(e)}
 
 
+def get_character_json(character_id):
+    """
+    Returns a character from the JSON store by ID (an O(1) index lookup), or None if it does not exist.
+    """
+    record = character_store.get(character_id)
+    return record.to_dict() if record else None
+
+
+def get_character_json_etag(character_id):
+    """
+    Returns the ETag of a character in the JSON store without serializing it, or None if it does not exist.
+    """
+    record = character_store.get(character_id)
+    return record_etag(record) if record else None
+
+
+def get_json_version():
+    """
+    Returns a token that changes whenever the JSON store changes, listing ETags are derived from it.
+    """
+    return character_store.version()
+
+
+def _if_match_precondition(if_match):
+    """
+    Turns the request's If-Match ETags into a store precondition (None when the header is absent).
+    """
+    if not if_match:
+        return None
+    return lambda record: if_match.contains(record_etag(record))
+
+
 def add_character(new_character):
     """
     Add a new character to the JSON file and return the updated character.
+    The ID comes from the store's persistent sequence instead of scanning all existing IDs.
     """
-    characters = load_characters()
-    new_character["id"] = set_id_for_new_character(characters)
-    characters.append(new_character)
-    save_characters(characters)
-    return new_character
+    return character_store.insert(new_character).to_dict()
 
 
-def set_id_for_new_character(characters):
+def update_character_json(character_id, changes, if_match=None):
     """
-    Determines the next available unique ID for a new character, extracting all existing IDs and find the max ID.
+    Updates the given fields of a character in the JSON file.
+    Returns the updated character and its ETag, or (None, None) if it does not exist.
+    With `if_match` (the request's If-Match ETags), the character is only written if its current ETag matches,
+    checked inside the store's write, otherwise PreconditionFailedError is raised.
     """
-    # Extract all character IDs into a list
-    character_ids = []
-    for character in characters:
-        character_ids.append(character["id"])
+    record = character_store.update(character_id, changes, precondition=_if_match_precondition(if_match))
+    return (record.to_dict(), record_etag(record)) if record else (None, None)
 
-    # Find the maximum ID from the list
-    if character_ids:  # Check if the list is not empty
-        max_id = max(character_ids)
-    else:
-        max_id = 0  # Default to 0 if there are no characters
 
-    return max_id + 1
+def delete_character_json(character_id, if_match=None):
+    """
+    Deletes a character from the JSON file. Returns False if it did not exist.
+    `if_match` works as in update_character_json().
+    """
+    return character_store.delete(character_id, precondition=_if_match_precondition(if_match))
@@ -0,0 +1,82 @@
+from flask import request
+from pydantic import ValidationError
+from app.config import Config
+
+
+def get_bulk_items():
+    """
+    Returns the JSON array of a bulk request.
+    Raises ValueError if the body is not a non-empty array or has more than BULK_MAX_ITEMS items.
+    """
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not items:
+        raise ValueError("Expected a non-empty JSON array.")
+    if len(items) > Config.BULK_MAX_ITEMS:
+        raise ValueError(f"A bulk request accepts at most {Config.BULK_MAX_ITEMS} items.")
+    return items
+
+
+def get_atomic_param():
+    """
+    Returns whether a bulk request is applied all-or-nothing (`atomic=true|false`, default BULK_ATOMIC).
+    """
+    atomic = request.args.get("atomic")
+    if atomic is None:
+        return Config.BULK_ATOMIC
+    if atomic.lower() not in ("true", "false"):
+        raise ValueError("atomic must be true or false.")
+    return atomic.lower() == "true"
+
+
+def item_error(status, message, field=None):
+    """
+    Builds the failure of one item: its HTTP-like status and a list of errors shaped like pydantic's.
+    """
+    return {"status": status, "errors": [{"loc": [field] if field else [], "msg": message}]}
+
+
+def validate_items(adapter, items):
+    """
+    Validates a whole array with one TypeAdapter call.
+    Returns (valid, errors): `valid` lists (index, validated item) of the items that passed,
+    `errors` maps the index of every failed item to its item_error()-shaped failure.
+    """
+    try:
+        return list(enumerate(adapter.validate_python(items))), {}
+    except ValidationError as error:
+        errors = {}
+        for detail in error.errors(include_url=False):
+            index, loc = detail["loc"][0], detail["loc"][1:]
+            failure = errors.setdefault(index, {"status": 400, "errors": []})
+            failure["errors"].append({"loc": list(loc), "msg": detail["msg"], "type": detail["type"]})
+
+    # Only the failed path validates twice, the items that passed are validated again without the failed ones
+    valid_indexes = [index for index in range(len(items)) if index not in errors]
+    return list(zip(valid_indexes, adapter.validate_python([items[index] for index in valid_indexes]))), errors
+
+
+def bulk_results(succeeded, errors, applied):
+    """
+    Builds the body of a bulk response: one result per item, ordered by index.
+    `succeeded` holds the results of the items that were (or, when not `applied`, would have been) stored.
+    Returns the body and its status code: 200/201 when every item succeeded, 207 when some failed in a
+    non-atomic request, 400 when an atomic request was rejected and nothing was stored.
+    """
+    results = [{"index": index, **failure} for index, failure in errors.items()]
+    if applied:
+        results += succeeded
+    results.sort(key=lambda result: result["index"])
+
+    if errors and not applied:
+        status = 400
+    elif errors:
+        status = 207
+    else:
+        status = succeeded[0]["status"] if succeeded else 200
+
+    return {
+        "applied": applied,
+        "succeeded": len(succeeded) if applied else 0,
+        "failed": len(errors),
+        "results": results,
+    }, status
@@ -0,0 +1,405 @@
+import io
+import os
+import json
+import time
+import hashlib
+import logging
+from itertools import islice
+from sqlalchemy import bindparam, delete, insert, select, update
+from app.models.character_model import Character, House, Strength
+from app.utils.json_provider import dumps_bytes
+from app.utils.json_store import CharacterStore, character_store
+from app.utils.json_snapshot import is_snapshot_fresh, read_snapshot, snapshot_path_for
+from app.utils.read_model import (
+    DIMENSIONS_DATASET, REFRESH_BATCH_SIZE, bump_generation, dialect_insert, refresh_read_rows
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Characters loaded per statement (executemany) or COPY
+IMPORT_CHUNK_SIZE = 5000
+
+# Bytes read from the input file at a time while streaming it
+READ_SIZE = 1 << 16
+
+# Columns of characters written by the import, in the order of the COPY rows
+IMPORT_COLUMNS = ["name", "house_id", "animal", "symbol", "nickname", "role", "age", "death", "strength_id"]
+
+# Fields of a characters.json record covered by its content hash (see record_hash)
+SYNC_FIELDS = [
+    "name", "house", "house_id", "animal", "symbol", "nickname", "role", "age", "death", "strength", "strength_id"
+]
+
+
+def iter_json_array(path, read_size=READ_SIZE):
+    """
+    Yields the elements of the top-level JSON array in a file one by one, reading the file in blocks,
+    so memory use depends on the size of one element instead of the whole file.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r") as file:
+        buffer = ""
+        position = 0
+        started = False  # Past the opening bracket
+        eof = False
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+
+            if position < len(buffer):
+                char = buffer[position]
+                if not started:
+                    if char != "[":
+                        raise ValueError(f"{path} does not contain a JSON array")
+                    started = True
+                    position += 1
+                    continue
+                if char == "]":
+                    return
+                if char == ",":
+                    position += 1
+                    continue
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # A value ending exactly at the end of the buffer may be cut (e.g. a number), read on to be sure
+                    if end < len(buffer) or eof:
+                        yield value
+                        position = end
+                        continue
+            elif eof:
+                raise ValueError(f"{path} ends before its JSON array is closed")
+
+            # Incomplete value or empty buffer: read the next block
+            block = file.read(read_size)
+            eof = not block
+            buffer = buffer[position:] + block
+            position = 0
+
+
+def iter_characters(json_path):
+    """
+    Yields the characters of a JSON file as dicts: from its binary snapshot when that is fresh,
+    otherwise streamed from the JSON file with iter_json_array().
+
+    When the JSON store's journal of the file holds writes that are not compacted yet (creates, updates and
+    deletes made through the JSON API), the characters are read through the store instead, as the snapshot
+    with the journal replayed on top, so imports and syncs see the same data as /characters/json.
+    """
+    same_file = os.path.exists(character_store.path) and os.path.samefile(json_path, character_store.path)
+    store = character_store if same_file else CharacterStore(json_path)
+    if os.path.exists(store.journal_path) and os.path.getsize(store.journal_path) > 0:
+        yield from (record.to_dict() for record in store.all())
+        return
+
+    snapshot_path = snapshot_path_for(json_path)
+    if is_snapshot_fresh(snapshot_path, json_path):
+        try:
+            records = read_snapshot(snapshot_path)
+        except (OSError, ValueError):
+            records = None  # Fall back to the JSON file
+        if records is not None:
+            yield from (record.to_dict() for record in records)
+            return
+    yield from iter_json_array(json_path)
+
+
+def insert_ignoring_conflicts(connection, table):
+    """
+    INSERT for `table` that skips rows violating a unique constraint (ON CONFLICT DO NOTHING on PostgreSQL
+    and SQLite, a plain INSERT elsewhere).
+    """
+    upsert = dialect_insert(connection)
+    if upsert is None:
+        return insert(table)
+    return upsert(table).on_conflict_do_nothing()
+
+
+class LookupCache:
+    """
+    In-memory map from the names of a lookup table (houses or strengths) to their ids.
+    Loaded with one SELECT, names that are missing are created for a whole chunk at once.
+    `created` tells whether any were created (the caller advances the dimensions generation once, at the end).
+    """
+
+    def __init__(self, connection, model, column):
+        self.connection = connection
+        self.table = model.__table__
+        self.column = column
+        self.ids = dict(connection.execute(select(column, model.id)).all())
+        self.known_ids = set(self.ids.values())
+        self.created = False
+
+    def resolve(self, names):
+        """
+        Makes sure every name of `names` has an id, creating the missing ones with one batched upsert.
+        """
+        missing = {name for name in names if name is not None and name not in self.ids}
+        if not missing:
+            return
+        self.connection.execute(
+            insert_ignoring_conflicts(self.connection, self.table), [{self.column.key: name} for name in missing]
+        )
+        created = dict(self.connection.execute(
+            select(self.column, self.table.c.id).where(self.column.in_(missing))
+        ).all())
+        self.ids.update(created)
+        self.known_ids.update(created.values())
+        self.created = True
+
+    def lookup(self, item, name_key, id_key):
+        """
+        Returns the id an item refers to: by name (`name_key`), or by an existing id (`id_key`) for items that
+        carry ids instead of names. None if it refers to nothing known.
+        """
+        name = item.get(name_key)
+        if name is not None:
+            return self.ids.get(name)
+        known_id = item.get(id_key)
+        return known_id if known_id in self.known_ids else None
+
+
+def _copy_value(value):
+    """
+    Encodes a value for COPY ... FROM STDIN in text format.
+    """
+    if value is None:
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _copy_rows(connection, rows):
+    """
+    Loads a chunk on PostgreSQL: COPY into the session's temporary staging table, then one INSERT ... SELECT
+    that skips names which already exist. Returns the ids of the inserted characters.
+    """
+    columns = ", ".join(IMPORT_COLUMNS)
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[column]) for column in IMPORT_COLUMNS) + "\n")
+
+    cursor = connection.connection.cursor()
+    copy_sql = f"COPY character_import ({columns}) FROM STDIN"
+    if hasattr(cursor, "copy_expert"):  # psycopg2
+        buffer.seek(0)
+        cursor.copy_expert(copy_sql, buffer)
+    else:  # psycopg 3
+        with cursor.copy(copy_sql) as copy:
+            copy.write(buffer.getvalue())
+
+    inserted_ids = connection.exec_driver_sql(
+        f"INSERT INTO characters ({columns}) SELECT {columns} FROM character_import "
+        f"ON CONFLICT (name) DO NOTHING RETURNING id"
+    ).scalars().all()
+    connection.exec_driver_sql("TRUNCATE character_import")
+    return inserted_ids
+
+
+def character_rows(items, houses, strengths):
+    """
+    Turns a chunk of character dicts into rows of the characters table (IMPORT_COLUMNS), creating missing
+    houses and strengths. Returns (item, row) pairs; items without name, role or a known strength are left out.
+    """
+    valid = [item for item in items if item.get("name") and item.get("role")]
+    houses.resolve({item.get("house") for item in valid})
+    strengths.resolve({item.get("strength") for item in valid})
+    rows = []
+    for item in valid:
+        row = {
+            "name": item["name"],
+            "house_id": houses.lookup(item, "house", "house_id"),
+            "animal": item.get("animal"),
+            "symbol": item.get("symbol"),
+            "nickname": item.get("nickname"),
+            "role": item["role"],
+            "age": item.get("age"),
+            "death": item.get("death"),
+            "strength_id": strengths.lookup(item, "strength", "strength_id"),
+        }
+        if row["strength_id"] is not None:
+            rows.append((item, row))
+    return rows
+
+
+def import_characters(connection, characters, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Loads characters (an iterable of dicts with house and strength names, e.g. iter_characters()) into the
+    database in chunks, on the given connection (the caller commits):
+    - houses and strengths are resolved through LookupCache, new ones are created with one upsert per chunk
+    - characters are written with COPY on PostgreSQL and one executemany INSERT elsewhere
+    - houses and strengths are given by name, or by id (items like those stored by the JSON store's clients)
+    - characters whose name already exists are skipped, as are items without name, role or a known strength
+    - the character_read rows of the inserted characters are refreshed once at the end
+
+    `progress` is called with the running stats after every chunk.
+    Returns the stats: read, inserted, skipped (invalid items), seconds and rows_per_second.
+    """
+    started = time.perf_counter()
+    houses = LookupCache(connection, House, House.name)
+    strengths = LookupCache(connection, Strength, Strength.description)
+
+    postgresql = connection.dialect.name == "postgresql"
+    if postgresql:
+        connection.exec_driver_sql(
+            f"CREATE TEMPORARY TABLE character_import ON COMMIT DROP AS "
+            f"SELECT {', '.join(IMPORT_COLUMNS)} FROM characters WITH NO DATA"
+        )
+    # Only the inserted rows are returned (names that already exist are skipped by ON CONFLICT DO NOTHING)
+    character_insert = insert_ignoring_conflicts(connection, Character.__table__).returning(Character.id)
+
+    stats = {"read": 0, "inserted": 0, "skipped": 0}
+    inserted_ids = []
+    characters = iter(characters)
+    while True:
+        chunk = list(islice(characters, chunk_size))
+        if not chunk:
+            break
+        stats["read"] += len(chunk)
+
+        rows = [row for _, row in character_rows(chunk, houses, strengths)]
+        stats["skipped"] += len(chunk) - len(rows)
+
+        if rows and postgresql:
+            inserted_ids += _copy_rows(connection, rows)
+        elif rows:
+            inserted_ids += connection.execute(character_insert, rows).scalars().all()
+        stats["inserted"] = len(inserted_ids)
+
+        if progress:
+            progress(_with_rates(stats, started))
+
+    if stats["skipped"]:
+        logger.warning(f"Skipped {stats['skipped']} characters without name, role or a known strength")
+
+    # The statements above bypass the session's after_flush sync of the listing table. Generations are only
+    # advanced here, so the run holds their row locks for its last step only (see bump_generation)
+    if inserted_ids:
+        refresh_read_rows(connection, inserted_ids)
+    _bump_dimensions(connection, houses, strengths)
+    return _with_rates(stats, started)
+
+
+def record_hash(item):
+    """
+    Content hash of a characters.json record, over SYNC_FIELDS (the record's id and unknown keys don't count).
+    """
+    return hashlib.sha1(dumps_bytes([item.get(field) for field in SYNC_FIELDS])).hexdigest()
+
+
+def sync_characters(connection, characters, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Makes the database match a characters file (an iterable of dicts, e.g. iter_characters()) by applying only
+    what changed since the last sync, on the given connection (the caller commits). Characters are matched by
+    name, and every written row stores the content hash of its record (characters.source_hash):
+    - records whose name is not in the database are inserted (one executemany INSERT per chunk)
+    - records whose hash differs from the stored one are updated (one executemany UPDATE per chunk)
+    - synced characters (with a stored hash) whose name is no longer in the file are deleted in batches
+    - characters created through the API (no stored hash) are only ever updated, never deleted
+
+    The stored hashes are read with one SELECT, and unchanged records cost a hash and a dict lookup, so a
+    sync of a mostly unchanged file takes about as long as reading it. Only the character_read rows of
+    changed characters are refreshed. Records without name, role or a known strength are skipped, as are
+    repeated names (the first record wins).
+
+    `progress` is called with the running stats after every chunk.
+    Returns the stats: read, inserted, updated, deleted, unchanged, skipped, seconds and rows_per_second.
+    """
+    started = time.perf_counter()
+    characters_table = Character.__table__
+    houses = LookupCache(connection, House, House.name)
+    strengths = LookupCache(connection, Strength, Strength.description)
+
+    # name -> (id, source_hash) of every character
+    stored = {
+        name: (character_id, source_hash) for name, character_id, source_hash in connection.execute(
+            select(characters_table.c.name, characters_table.c.id, characters_table.c.source_hash)
+        )
+    }
+
+    columns = IMPORT_COLUMNS + ["source_hash"]
+    character_insert = insert(characters_table).returning(characters_table.c.id, sort_by_parameter_order=True)
+    character_update = update(characters_table).where(characters_table.c.id == bindparam("_id")).values(
+        **{column: bindparam(f"new_{column}") for column in columns}, version=characters_table.c.version + 1
+    )
+
+    stats = {"read": 0, "inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "skipped": 0}
+    seen = set()
+    changed_ids = []
+    characters = iter(characters)
+    while True:
+        chunk = list(islice(characters, chunk_size))
+        if not chunk:
+            break
+        stats["read"] += len(chunk)
+
+        # Hash first, so lookups are only resolved for the records that changed
+        pending = []
+        unchanged = 0
+        for item in chunk:
+            name = item.get("name")
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            item_hash = record_hash(item)
+            if name in stored and stored[name][1] == item_hash:
+                unchanged += 1
+            else:
+                pending.append({**item, "source_hash": item_hash})
+
+        inserts, updates = [], []
+        for item, row in character_rows(pending, houses, strengths):
+            row["source_hash"] = item["source_hash"]
+            if item["name"] in stored:
+                updates.append({"_id": stored[item["name"]][0], **{f"new_{key}": row[key] for key in columns}})
+            else:
+                inserts.append(row)
+        stats["skipped"] += len(chunk) - unchanged - len(inserts) - len(updates)
+        stats["unchanged"] += unchanged
+
+        if inserts:
+            changed_ids += connection.execute(character_insert, inserts).scalars().all()
+        if updates:
+            connection.execute(character_update, updates)
+            changed_ids += [row["_id"] for row in updates]
+        stats["inserted"] += len(inserts)
+        stats["updated"] += len(updates)
+
+        if progress:
+            progress(_with_rates(stats, started))
+
+    # Synced characters that left the file
+    deleted_ids = [
+        character_id for name, (character_id, source_hash) in stored.items()
+        if source_hash is not None and name not in seen
+    ]
+    for start in range(0, len(deleted_ids), REFRESH_BATCH_SIZE):
+        batch = deleted_ids[start:start + REFRESH_BATCH_SIZE]
+        connection.execute(delete(characters_table).where(characters_table.c.id.in_(batch)))
+    stats["deleted"] = len(deleted_ids)
+
+    if stats["skipped"]:
+        logger.warning(f"Skipped {stats['skipped']} characters without name, role or a known strength, or repeated")
+
+    # The statements above bypass the session's after_flush sync of the listing table. Generations are only
+    # advanced here, so the run holds their row locks for its last step only (see bump_generation)
+    if changed_ids or deleted_ids:
+        refresh_read_rows(connection, changed_ids + deleted_ids)
+    _bump_dimensions(connection, houses, strengths)
+    return _with_rates(stats, started)
+
+
+def _bump_dimensions(connection, houses, strengths):
+    """
+    Outdates the dimension caches of running processes if the run created houses or strengths.
+    """
+    if houses.created or strengths.created:
+        bump_generation(connection, DIMENSIONS_DATASET)
+
+
+def _with_rates(stats, started):
+    seconds = time.perf_counter() - started
+    return {**stats, "seconds": seconds, "rows_per_second": stats["read"] / seconds if seconds else 0.0}
@@ -1,5 +1,13 @@
+import json
 from sqlalchemy.exc import SQLAlchemyError
 from app import db, handle_sqlalchemy_error
+from app.config import Config
+from app.utils.cache import TTLCache
+from app.utils.etags import dataset_generation
+
+
+# Exact counts of filtered queries, keyed by the characters generation and the normalized filter set
+count_cache = TTLCache(max_size=512, ttl=Config.COUNT_CACHE_TTL)
 
 
 def safe_commit():
@@ -13,12 +21,44 @@ def safe_commit():
         return handle_sqlalchemy_error(db_error)
 
 
-def get_total_count(model):
+def filters_cache_key(filters, generation):
+    """
+    Normalizes a filters dictionary into a hashable key, independent of the order of the query parameters.
+    `generation` (see dataset_generation()) makes the key change whenever the characters are written.
+    """
+    return generation, tuple(sorted(filters.items()))
+
+
+def get_filtered_count(query, filters, generation=None):
+    """
+    Returns the exact number of rows matched by a filtered (unsorted, unpaginated) query.
+    Counts are cached for COUNT_CACHE_TTL seconds per filter set, so repeated listings don't recount the table.
+    The key includes the dataset generation (read unless the caller already has it as `generation`), so a write
+    by any process makes the next listing count again.
     """
-    Returns the total count of records (rows) for a given SQLAlchemy model.
+    key = filters_cache_key(filters, dataset_generation() if generation is None else generation)
+    total = count_cache.get(key)
+    if total is None:
+        total = query.order_by(None).count()
+        count_cache.set(key, total)
+    return total
+
 
-    Let’s say you want to get the total count of all characters in your Character table.
-    Instead of writing db.session.query(Character).count() each time, use the get_total_count function.
-    total_characters = get_total_count(Character)
+def estimate_count(query, filters, generation=None):
     """
-    return db.session.query(model).count()
+    Returns the planner's row estimate for a filtered query (PostgreSQL `EXPLAIN`), which costs no table scan.
+    Other databases have no cheap estimate, so they fall back to the (cached) exact count.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name != "postgresql":
+        return get_filtered_count(query, filters, generation)
+
+    # Compiled for the driver (e.g. %(name_1)s placeholders), so filter values are sent as parameters; expanding
+    # IN parameters are rendered as one placeholder per value, exec_driver_sql() can't expand them
+    statement = query.order_by(None).enable_eagerloads(False).statement.compile(
+        dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", statement.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,135 @@
+import re
+import time
+import threading
+from collections import namedtuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app import db
+from app.config import Config
+from app.models.character_model import House, Strength
+from app.utils.etags import dataset_generation
+from app.utils.read_model import DIMENSIONS_DATASET
+
+
+# One loaded state of the lookup tables: id -> house name, id -> strength description
+Dimensions = namedtuple("Dimensions", ["version", "houses", "strengths"])
+
+
+def like_matcher(value):
+    """
+    Returns a function telling whether a string matches ilike('%value%') (% and _ are wildcards, like in SQL).
+    """
+    pattern = "".join(".*" if char == "%" else "." if char == "_" else re.escape(char) for char in value)
+    return re.compile(pattern, re.IGNORECASE | re.DOTALL).search
+
+
+class DimensionCache:
+    """
+    Process-local copy of the houses and strengths tables (a few rows that rarely change), so filters can
+    resolve names to ids and characters can be serialized without joining or querying them.
+
+    The copy is loaded on first use and carries the "dimensions" generation of dataset_generations, which
+    every write to houses or strengths advances (app/utils/read_model.py). Writes committed by this process
+    drop the copy right away. Writes of other processes are noticed by comparing the generation, at most every
+    DIMENSION_CACHE_TTL seconds (on every call with `check`), and an id that is not in the copy reloads it at once.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = Config.DIMENSION_CACHE_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._dimensions = None
+        self._checked_at = 0.0
+
+    def get(self, reload=False, check=False):
+        """
+        Returns the current Dimensions, loading them if they are missing, outdated or `reload` is set.
+        With `check`, the generation is compared even if it was checked less than DIMENSION_CACHE_TTL ago.
+        """
+        dimensions = self._dimensions
+        if dimensions is not None and not reload:
+            if check:
+                if dimensions.version == dataset_generation(DIMENSIONS_DATASET):
+                    return dimensions
+            elif time.monotonic() - self._checked_at < self.ttl:
+                return dimensions
+
+        with self._lock:
+            version = dataset_generation(DIMENSIONS_DATASET)
+            dimensions = self._dimensions
+            if dimensions is None or reload or dimensions.version != version:
+                dimensions = Dimensions(
+                    version,
+                    dict(db.session.execute(select(House.id, House.name)).all()),
+                    dict(db.session.execute(select(Strength.id, Strength.description)).all()),
+                )
+                self._dimensions = dimensions
+            self._checked_at = time.monotonic()
+        return dimensions
+
+    def invalidate(self):
+        self._dimensions = None
+
+    def house_ids(self, value):
+        """
+        Returns the ids of the houses whose name matches ilike('%value%').
+        """
+        matches = like_matcher(value)
+        return sorted(house_id for house_id, name in self.get().houses.items() if matches(name))
+
+    def strength_ids(self, value):
+        """
+        Returns the ids of the strengths whose description matches ilike('%value%').
+        """
+        matches = like_matcher(value)
+        return sorted(strength_id for strength_id, description in self.get().strengths.items() if matches(description))
+
+    def character_dict(self, character, check=False):
+        """
+        Returns a Character as the dict serialize_character() validates, with house and strength filled in
+        from the cache instead of loading the relationships. `check` is passed on to get().
+        """
+        dimensions = self.get(check=check)
+        if (character.house_id is not None and character.house_id not in dimensions.houses) \
+                or character.strength_id not in dimensions.strengths:
+            dimensions = self.get(reload=True)  # Created by another process since the last load
+
+        house_name = dimensions.houses.get(character.house_id)
+        strength_description = dimensions.strengths.get(character.strength_id)
+        return {
+            "id": character.id,
+            "name": character.name,
+            "house": {"id": character.house_id, "name": house_name} if house_name is not None else None,
+            "animal": character.animal,
+            "symbol": character.symbol,
+            "nickname": character.nickname,
+            "role": character.role,
+            "age": character.age,
+            "death": character.death,
+            "strength": {"id": character.strength_id, "description": strength_description}
+            if strength_description is not None else None,
+        }
+
+
+dimension_cache = DimensionCache()
+
+
+def _invalidate_after_commit(session):
+    """
+    after_commit listener: drops the cache once a transaction that wrote houses or strengths is committed
+    (the after_flush sync of the read model flags the session).
+    """
+    if session.info.pop("dimensions_changed", False):
+        dimension_cache.invalidate()
+
+
+def _forget_after_rollback(session, previous_transaction):
+    session.info.pop("dimensions_changed", None)
+
+
+def register_dimension_cache():
+    """
+    Keeps the dimension cache in step with the houses and strengths written by this process.
+    """
+    if not event.contains(Session, "after_commit", _invalidate_after_commit):
+        event.listen(Session, "after_commit", _invalidate_after_commit)
+        event.listen(Session, "after_soft_rollback", _forget_after_rollback)
@@ -0,0 +1,112 @@
+import hashlib
+from flask import current_app, jsonify, request
+from sqlalchemy import select
+from app import db
+from app.models.character_model import Character, DatasetGeneration
+from app.utils.response_cache import normalize_params
+
+
+def make_etag(*parts):
+    """
+    Builds a strong ETag value (without quotes) from the given parts (str, bytes or anything with a str()).
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()[:20]
+
+
+def character_etag(character_id, version):
+    """
+    ETag of /characters/<id>: the character's id and row version, known without loading or serializing it.
+    """
+    return f"c{character_id}.{version}"
+
+
+def if_match_versions(character_id):
+    """
+    Returns the versions of a character accepted by the request's If-Match (parsed from its "c<id>.<version>"
+    ETags), to be checked by the write itself. None when any version may be written (no If-Match, or *).
+    """
+    if not request.if_match or request.if_match.star_tag:
+        return None
+    prefix = f"c{character_id}."
+    return {
+        int(tag[len(prefix):]) for tag in request.if_match.as_set()
+        if tag.startswith(prefix) and tag[len(prefix):].isdigit()
+    }
+
+
+def record_etag(record):
+    """
+    ETag of /characters/json/<id>: a hash of the record's encoded JSON (encoded on each call, records don't keep it).
+    """
+    return make_etag(record.to_json())
+
+
+def listing_etag(version, **params):
+    """
+    ETag of a listing: the version of the data it reads plus its normalized parameters (see normalize_params).
+    Returns None for listings whose body varies between identical requests (random samples, estimated totals).
+    """
+    if params.get("limit") == "random" or params.get("count") == "estimate":
+        return None
+    return make_etag(version, normalize_params(params))
+
+
+def get_character_version(character_id):
+    """
+    Returns the row version of a character (a primary key lookup of one column), or None if it does not exist.
+    """
+    return db.session.execute(select(Character.version).where(Character.id == character_id)).scalar()
+
+
+def dataset_generation(name="characters"):
+    """
+    Returns the current generation of a dataset (see DatasetGeneration), 0 if it has never been written.
+    """
+    generation = db.session.execute(
+        select(DatasetGeneration.generation).where(DatasetGeneration.name == name)
+    ).scalar()
+    return generation or 0
+
+
+def is_not_modified(etag):
+    """
+    True if the request's If-None-Match matches `etag` (weak comparison, as RFC 9110 requires for GET).
+    """
+    return etag is not None and request.if_none_match.contains_weak(etag)
+
+
+def is_precondition_failed(etag):
+    """
+    True if the request has an If-Match header that doesn't match `etag` (strong comparison).
+    Requests without If-Match always pass.
+    """
+    return bool(request.if_match) and not request.if_match.contains(etag)
+
+
+def not_modified(etag):
+    """
+    Empty 304 Not Modified response carrying the ETag.
+    """
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def precondition_failed():
+    """
+    412 Precondition Failed response for a stale If-Match.
+    """
+    return jsonify({"message": "The character was modified since it was fetched (If-Match does not match)"}), 412
+
+
+def with_etag(response, etag):
+    """
+    Sets the ETag header of a response (if there is one) and returns the response.
+    """
+    if etag is not None:
+        response.set_etag(etag)
+    return response
@@ -0,0 +1,50 @@
+from flask import request
+
+
+# Fields a response can be narrowed to, in the order they are serialized (same names for both backends)
+CHARACTER_RESPONSE_FIELDS = (
+    "id", "name", "house", "animal", "symbol", "nickname", "role", "age", "death", "strength", "house_id", "strength_id"
+)
+
+# Fields of a full character (the response without fields/include)
+FULL_CHARACTER_FIELDS = frozenset(CHARACTER_RESPONSE_FIELDS) - {"house_id", "strength_id"}
+
+# Related objects that can be embedded with `include`
+INCLUDABLE_RELATIONS = ("house", "strength")
+
+
+def _split_param(name):
+    value = request.args.get(name, type=str)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+
+def get_fieldset_params():
+    """
+    Extract and validate the sparse fieldset parameters.
+    Returns the set of fields to return, or None to return full characters (neither parameter given).
+
+    Query Parameters:
+    - fields: Comma-separated character fields, e.g. fields=id,name,house (the id is always returned)
+    - include: Comma-separated related objects to embed, house and/or strength
+    """
+    fields = _split_param("fields")
+    include = _split_param("include")
+    if fields is None and include is None:
+        return None
+
+    fields = fields or set()
+    include = include or set()
+
+    unknown_fields = fields - set(CHARACTER_RESPONSE_FIELDS)
+    if unknown_fields:
+        raise ValueError(f"Invalid value for fields: {', '.join(sorted(unknown_fields))}. "
+                         f"Allowed: {', '.join(CHARACTER_RESPONSE_FIELDS)}.")
+
+    unknown_relations = include - set(INCLUDABLE_RELATIONS)
+    if unknown_relations:
+        raise ValueError(f"Invalid value for include: {', '.join(sorted(unknown_relations))}. "
+                         f"Allowed: {', '.join(INCLUDABLE_RELATIONS)}.")
+
+    return {"id"} | fields | include
@@ -1,5 +1,7 @@
 from flask import request
-from app.models.character_model import Character, House, Strength
+from app.models.character_model import CharacterRead
+from app.utils.dimensions import dimension_cache
+from app.utils.search import search_condition
 
 
 # Define constraints
@@ -57,39 +59,51 @@ def apply_filters(query, filters):
     If the filter is present, it applies a corresponding filter condition to the query.
     After all filters have been applied, it returns the modified query.
     """
+    # Free-text search (q=) over name, nickname, role, animal and symbol, answered by the search index
+    if "q" in filters:
+        query = query.filter(search_condition(filters["q"]))
+
     if "name" in filters:
         # ilike(): case-insensitive matching, f"%{filters['name']}%": allows for partial matches
-        query = query.filter(Character.name.ilike(f"%{filters['name']}%"))
+        query = query.filter(CharacterRead.name.ilike(f"%{filters['name']}%"))
 
-    # Filtering by house name using a join to the houses table
+    # House names and strength descriptions are matched against the dimension cache, so the filter becomes an
+    # indexed house_id/strength_id IN (...). Names the cache doesn't know (yet) fall back to the name columns.
     if "house" in filters:
-        query = query.join(House).filter(House.name.ilike(f"%{filters['house']}%"))
+        house_ids = dimension_cache.house_ids(filters["house"])
+        if house_ids:
+            query = query.filter(CharacterRead.house_id.in_(house_ids))
+        else:
+            query = query.filter(CharacterRead.house_name.ilike(f"%{filters['house']}%"))
 
-    # Filtering by strength description using a join to the strengths table
     if "strength" in filters:
-        query = query.join(Strength).filter(Strength.description.ilike(f"%{filters['strength']}%"))
+        strength_ids = dimension_cache.strength_ids(filters["strength"])
+        if strength_ids:
+            query = query.filter(CharacterRead.strength_id.in_(strength_ids))
+        else:
+            query = query.filter(CharacterRead.strength_description.ilike(f"%{filters['strength']}%"))
 
     if "role" in filters:
-        query = query.filter(Character.role.ilike(f"%{filters['role']}%"))
+        query = query.filter(CharacterRead.role.ilike(f"%{filters['role']}%"))
 
     if "animal" in filters:
-        query = query.filter(Character.animal.ilike(f"%{filters['animal']}%"))
+        query = query.filter(CharacterRead.animal.ilike(f"%{filters['animal']}%"))
 
     if "age" in filters:
-        query = query.filter(Character.age == filters["age"])
+        query = query.filter(CharacterRead.age == filters["age"])
 
     if "age_more_than" in filters:
-        query = query.filter(Character.age >= filters["age_more_than"])
+        query = query.filter(CharacterRead.age >= filters["age_more_than"])
 
     if "age_less_than" in filters:
-        query = query.filter(Character.age <= filters["age_less_than"])
+        query = query.filter(CharacterRead.age <= filters["age_less_than"])
 
-    # Filtering by house ID (exact match) using a join with the House table
+    # Filtering by house ID (exact match)
     if "house_id" in filters:
-        query = query.filter(Character.house_id == filters["house_id"])
+        query = query.filter(CharacterRead.house_id == filters["house_id"])
 
-    # Filtering by strength ID (exact match) using a join with the Strength table
+    # Filtering by strength ID (exact match)
     if "strength_id" in filters:
-        query = query.filter(Character.strength_id == filters["strength_id"])
+        query = query.filter(CharacterRead.strength_id == filters["strength_id"])
 
     return query
@@ -0,0 +1,196 @@
+import random
+import threading
+from bisect import bisect_left, bisect_right
+from app.utils.json_utils import get_characters
+from app.utils.sampling import reservoir_sample
+
+
+# Filters that match a case-insensitive substring, same vocabulary as get_filter_params()
+SUBSTRING_FILTER_FIELDS = ("name", "house", "strength", "animal", "role")
+
+# Filters that match an exact integer value
+EXACT_FILTER_FIELDS = ("age", "house_id", "strength_id")
+
+# Fields that can be sorted on, mirrors ALLOWED_SORT_FIELDS of the database backend
+SORT_FIELDS = ("name", "age", "house", "role", "nickname", "animal", "symbol", "death", "strength")
+
+
+class CharacterQueryEngine:
+    """
+    In-memory filter and sort engine for the characters of the JSON backend.
+
+    The engine is built once per version of the character list and precomputes everything a query needs:
+    - a hash index per filterable field (lowercase value -> positions), so substring filters only test
+      each distinct value once and exact filters are a single dict lookup
+    - the ages in sorted order, so age ranges are answered with a binary search
+    - a presorted permutation per sort field (built on first use), so a sorted page never sorts the whole list
+
+    Positions refer to the index of a character in `characters`, a list of CharacterRecord objects.
+    """
+
+    def __init__(self, characters):
+        self.characters = characters
+        self._lock = threading.Lock()
+        self._permutations = {}  # sort field -> positions sorted ascending
+        self._ranks = {}  # sort field -> rank of every position in the ascending permutation
+
+        self._indexes = {field: {} for field in SUBSTRING_FILTER_FIELDS + EXACT_FILTER_FIELDS}
+        for position, character in enumerate(characters):
+            for field in SUBSTRING_FILTER_FIELDS:
+                value = getattr(character, field)
+                if value is not None:
+                    self._indexes[field].setdefault(str(value).lower(), []).append(position)
+            for field in EXACT_FILTER_FIELDS:
+                value = getattr(character, field)
+                if value is not None:
+                    self._indexes[field].setdefault(value, []).append(position)
+
+        # (age, position) pairs in age order, characters without age are left out
+        aged = sorted((character.age, position) for position, character in enumerate(characters)
+                      if isinstance(character.age, int))
+        self._sorted_ages = [age for age, _ in aged]
+        self._age_positions = [position for _, position in aged]
+
+    def _substring_matches(self, field, value):
+        """
+        Positions whose field contains `value` (case-insensitive), testing each distinct value only once.
+        """
+        needle = value.lower()
+        matches = set()
+        for key, positions in self._indexes[field].items():
+            if needle in key:
+                matches.update(positions)
+        return matches
+
+    def _age_range(self, low=None, high=None):
+        """
+        Positions with low <= age <= high, found with a binary search over the sorted ages.
+        """
+        start = bisect_left(self._sorted_ages, low) if low is not None else 0
+        end = bisect_right(self._sorted_ages, high) if high is not None else len(self._sorted_ages)
+        return set(self._age_positions[start:end])
+
+    def search(self, filters):
+        """
+        Returns the set of positions matching all filters, or None when no filter applies (all characters match).
+        """
+        candidate_sets = []
+
+        for field in SUBSTRING_FILTER_FIELDS:
+            if field in filters:
+                candidate_sets.append(self._substring_matches(field, filters[field]))
+
+        for field in EXACT_FILTER_FIELDS:
+            if field in filters:
+                candidate_sets.append(set(self._indexes[field].get(filters[field], ())))
+
+        if "age_more_than" in filters or "age_less_than" in filters:
+            candidate_sets.append(self._age_range(filters.get("age_more_than"), filters.get("age_less_than")))
+
+        if not candidate_sets:
+            return None
+
+        # Intersect starting with the smallest set, so the work is bounded by the most selective filter
+        candidate_sets.sort(key=len)
+        result = candidate_sets[0]
+        for candidates in candidate_sets[1:]:
+            if not result:
+                break
+            result = result & candidates
+        return result
+
+    def count(self, candidates):
+        """
+        Number of matching characters for a result of search().
+        """
+        return len(self.characters) if candidates is None else len(candidates)
+
+    def _sort_key(self, field):
+        """
+        Builds the ascending sort key for a field: missing values last (like PostgreSQL), then the
+        case-insensitive value, with the id as tiebreaker so the order is stable across requests.
+        """
+        def key(position):
+            character = self.characters[position]
+            value = getattr(character, field)
+            if isinstance(value, str):
+                value = value.lower()
+            return value is None, value if value is not None else 0, character.id or 0
+        return key
+
+    def _permutation(self, field):
+        """
+        Returns the positions sorted ascending by `field` and the rank of each position, built once per engine.
+        """
+        permutation = self._permutations.get(field)
+        if permutation is None:
+            with self._lock:
+                permutation = self._permutations.get(field)
+                if permutation is None:
+                    permutation = sorted(range(len(self.characters)), key=self._sort_key(field))
+                    ranks = [0] * len(permutation)
+                    for rank, position in enumerate(permutation):
+                        ranks[position] = rank
+                    self._ranks[field] = ranks
+                    self._permutations[field] = permutation
+        return permutation, self._ranks[field]
+
+    def page(self, candidates, sort_by, sort_order, limit, skip):
+        """
+        Returns one sorted page of matching characters.
+        Small result sets are ordered by their precomputed rank, large ones are collected by walking the
+        presorted permutation until the page is full. Neither case sorts the full character list.
+        """
+        if sort_by not in SORT_FIELDS:
+            sort_by = "name"
+        permutation, ranks = self._permutation(sort_by)
+        descending = sort_order == "desc"
+
+        if candidates is None:
+            ordered = permutation[::-1] if descending else permutation
+            positions = ordered[skip: skip + limit]
+        elif len(candidates) * 8 <= len(permutation):
+            ordered = sorted(candidates, key=ranks.__getitem__, reverse=descending)
+            positions = ordered[skip: skip + limit]
+        else:
+            positions = []
+            seen = 0
+            for position in (reversed(permutation) if descending else permutation):
+                if position not in candidates:
+                    continue
+                seen += 1
+                if seen > skip:
+                    positions.append(position)
+                    if len(positions) >= limit:
+                        break
+
+        return [self.characters[position] for position in positions]
+
+    def sample(self, candidates, size):
+        """
+        Returns up to `size` random matching characters, without copying or sorting the matches first.
+        """
+        if candidates is None:
+            positions = random.sample(range(len(self.characters)), min(size, len(self.characters)))
+        else:
+            positions = reservoir_sample(candidates, size)
+        return [self.characters[position] for position in positions]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_query_engine():
+    """
+    Returns the query engine for the current characters, rebuilding it only when the JSON store reloaded.
+    """
+    global _engine
+    characters = get_characters()
+    engine = _engine
+    if engine is None or engine.characters is not characters:
+        with _engine_lock:
+            if _engine is None or _engine.characters is not characters:
+                _engine = CharacterQueryEngine(characters)
+            engine = _engine
+    return engine
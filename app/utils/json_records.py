@@ -0,0 +1,141 @@
+import threading
+from app.utils.json_provider import dumps_bytes
+
+
+# Fields of a JSON character, in the order they are serialized
+CHARACTER_FIELDS = ("id", "name", "house", "animal", "symbol", "nickname", "role", "age", "death", "strength")
+
+# Optional reference fields, only serialized when set (older records use them instead of house/strength names)
+REFERENCE_FIELDS = ("house_id", "strength_id")
+
+# Low-cardinality string fields whose values repeat across many characters and are stored as codes of the
+# string table. Free-text fields (animal, symbol, role) are kept as plain strings: the table never shrinks,
+# so interning every distinct value clients submit would grow it for the life of the process.
+INTERNED_FIELDS = ("house", "strength")
+
+
+class StringTable:
+    """
+    Maps repeated strings to small integer codes, so every distinct value is stored only once.
+    Code 0 is reserved for None.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codes = {}
+        self.strings = [None]
+
+    def code(self, value):
+        """
+        Returns the code of `value`, adding it to the table if it is new.
+        """
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self.strings)
+                    self.strings.append(value)
+                    self._codes[value] = code
+        return code
+
+
+# Shared by all records of the process, the JSON data only has a handful of houses and strengths
+string_table = StringTable()
+
+
+class CharacterRecord:
+    """
+    Compact, immutable in-memory representation of a character of the JSON backend.
+
+    Uses __slots__ instead of a per-record dict, and stores house and strength as codes of the shared
+    string table. Attribute access returns the decoded values, dicts are only built
+    by to_dict() when a character is serialized.
+    """
+
+    __slots__ = ("id", "name", "nickname", "age", "death", "house_id", "strength_id", "animal", "symbol", "role",
+                 "_house", "_strength")
+
+    def __init__(self, id, name=None, house=None, animal=None, symbol=None, nickname=None, role=None,
+                 age=None, death=None, strength=None, house_id=None, strength_id=None):
+        self.id = id
+        self.name = name
+        self.nickname = nickname
+        self.age = age
+        self.death = death
+        self.house_id = house_id
+        self.strength_id = strength_id
+        self.animal = animal
+        self.symbol = symbol
+        self.role = role
+        self._house = string_table.code(house)
+        self._strength = string_table.code(strength)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds a record from a character dict, unknown keys are ignored.
+        """
+        return cls(**{field: data.get(field) for field in CHARACTER_FIELDS + REFERENCE_FIELDS})
+
+    @classmethod
+    def from_codes(cls, id, name, nickname, age, death, house_id, strength_id, animal, symbol, role,
+                   house_code, strength_code):
+        """
+        Builds a record from values that are already encoded with the string table (used by bulk loaders).
+        """
+        record = cls.__new__(cls)
+        record.id = id
+        record.name = name
+        record.nickname = nickname
+        record.age = age
+        record.death = death
+        record.house_id = house_id
+        record.strength_id = strength_id
+        record.animal = animal
+        record.symbol = symbol
+        record.role = role
+        record._house = house_code
+        record._strength = strength_code
+        return record
+
+    @property
+    def house(self):
+        return string_table.strings[self._house]
+
+    @property
+    def strength(self):
+        return string_table.strings[self._strength]
+
+    def replace(self, **changes):
+        """
+        Returns a copy of the record with the given fields changed.
+        """
+        return CharacterRecord.from_dict({**self.to_dict(), **changes})
+
+    def to_dict(self, fields=None):
+        """
+        Convert the record to the character dict returned by the API and stored in the JSON file.
+        With `fields` (a set of field names) only those fields are included.
+        """
+        if fields is not None:
+            return {field: getattr(self, field) for field in CHARACTER_FIELDS + REFERENCE_FIELDS if field in fields}
+
+        data = {field: getattr(self, field) for field in CHARACTER_FIELDS}
+        for field in REFERENCE_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        return data
+
+    def to_json(self):
+        """
+        Returns to_dict() encoded as JSON bytes. Not kept on the record, so a worker holds no encoded copy of
+        every character it has served (whole listing pages are cached by the response cache instead).
+        """
+        return dumps_bytes(self.to_dict())
+
+    def __repr__(self):
+        return f"<CharacterRecord {self.name}>"
@@ -0,0 +1,159 @@
+import os
+import json
+import mmap
+import struct
+from app.utils.json_records import CharacterRecord, CHARACTER_FIELDS, REFERENCE_FIELDS, INTERNED_FIELDS, string_table
+
+
+# Binary snapshot layout (all values little-endian):
+#   header         magic, format version, number of columns, number of characters, number of strings
+#   string table   (strings + 1) uint32 offsets into the blob, followed by the UTF-8 blob (padded to 4 bytes)
+#   columns        one array per field in COLUMNS order, `characters` values each
+# String columns are int32 arrays holding 1 + the index into the string table (0 = None), integer columns are
+# int64 arrays holding the value itself (NULL_INT = None). Every column is unpacked straight from the mmap.
+MAGIC = b"GOTC"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHHII")
+COLUMNS = CHARACTER_FIELDS + REFERENCE_FIELDS
+INT_FIELDS = {"id", "age", "death", "house_id", "strength_id"}
+NULL_INT = -2 ** 63
+
+
+def column_format(field, count):
+    """
+    struct format of a column of `count` values: int64 for integer fields, int32 string indexes otherwise.
+    """
+    return f"<{count}{'q' if field in INT_FIELDS else 'i'}"
+
+
+def snapshot_path_for(json_path):
+    """
+    Returns the path of the binary snapshot belonging to a JSON file (characters.json -> characters.bin).
+    """
+    return f"{os.path.splitext(json_path)[0]}.bin"
+
+
+def is_snapshot_fresh(snapshot_path, json_path):
+    """
+    A snapshot can be used instead of the JSON file when both exist and the snapshot is at least as new.
+    """
+    try:
+        return os.stat(snapshot_path).st_mtime_ns >= os.stat(json_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def build_snapshot(characters):
+    """
+    Encodes characters (dicts or CharacterRecord objects) into the binary snapshot format.
+    Raises struct.error for integers that don't fit in 64 bits.
+    """
+    rows = [character if isinstance(character, dict) else character.to_dict() for character in characters]
+
+    strings = {}
+    columns = {field: [] for field in COLUMNS}
+    for row in rows:
+        for field in COLUMNS:
+            value = row.get(field)
+            if field in INT_FIELDS:
+                columns[field].append(NULL_INT if value is None else int(value))
+            elif value is None:
+                columns[field].append(0)
+            else:
+                columns[field].append(strings.setdefault(str(value), len(strings)) + 1)
+
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = [0]
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    blob = b"".join(encoded)
+    blob += b"\0" * (-len(blob) % 4)
+
+    parts = [
+        HEADER.pack(MAGIC, FORMAT_VERSION, len(COLUMNS), len(rows), len(encoded)),
+        struct.pack(f"<{len(offsets)}I", *offsets),
+        blob,
+    ]
+    parts.extend(struct.pack(column_format(field, len(rows)), *columns[field]) for field in COLUMNS)
+    return b"".join(parts)
+
+
+def write_snapshot(characters, snapshot_path):
+    """
+    Writes the binary snapshot to a temporary file and renames it into place.
+    """
+    data = build_snapshot(characters)  # Encoded first, so a failure leaves no temporary file behind
+    temp_path = f"{snapshot_path}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, snapshot_path)
+
+
+def read_snapshot(snapshot_path):
+    """
+    Loads the characters of a binary snapshot as CharacterRecord objects.
+
+    The file is memory-mapped and each column is unpacked in one call, so there is no text to parse and
+    all processes reading the same snapshot share one copy of it in the page cache.
+    Each distinct string is decoded only once. Raises ValueError if the file is not a valid snapshot.
+    """
+    with open(snapshot_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            try:
+                magic, version, column_count, count, string_count = HEADER.unpack_from(mapped, 0)
+                if magic != MAGIC or version != FORMAT_VERSION or column_count != len(COLUMNS):
+                    raise ValueError(f"{snapshot_path} is not a character snapshot of version {FORMAT_VERSION}")
+
+                position = HEADER.size
+                offsets = struct.unpack_from(f"<{string_count + 1}I", mapped, position)
+                position += 4 * (string_count + 1)
+                blob_start = position
+                position += offsets[-1] + (-offsets[-1] % 4)
+
+                strings = [None]
+                for index in range(string_count):
+                    strings.append(mapped[blob_start + offsets[index]: blob_start + offsets[index + 1]].decode("utf-8"))
+
+                # Interned fields are translated to string table codes once per distinct string, not per character
+                codes = {}
+
+                columns = {}
+                for field in COLUMNS:
+                    column_struct = struct.Struct(column_format(field, count))
+                    column = column_struct.unpack_from(mapped, position)
+                    if field in INT_FIELDS:
+                        columns[field] = [None if value == NULL_INT else value for value in column]
+                    elif field in INTERNED_FIELDS:
+                        for value in set(column) - codes.keys():
+                            codes[value] = string_table.code(strings[value])
+                        columns[field] = [codes[value] for value in column]
+                    else:
+                        columns[field] = [strings[value] for value in column]
+                    position += column_struct.size
+            except struct.error as error:
+                raise ValueError(f"{snapshot_path} is truncated") from error
+
+    return [
+        CharacterRecord.from_codes(*values)
+        for values in zip(*(columns[field] for field in (
+            "id", "name", "nickname", "age", "death", "house_id", "strength_id",
+            "animal", "symbol", "role", "house", "strength"
+        )))
+    ]
+
+
+def read_characters(json_path):
+    """
+    Returns the characters of a JSON file as dicts, read from its binary snapshot when that is fresh.
+    """
+    snapshot_path = snapshot_path_for(json_path)
+    if is_snapshot_fresh(snapshot_path, json_path):
+        try:
+            return [record.to_dict() for record in read_snapshot(snapshot_path)]
+        except (OSError, ValueError):
+            pass  # Fall back to the JSON file
+
+    with open(json_path, 'r') as file:
+        return json.load(file)
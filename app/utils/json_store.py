@@ -0,0 +1,586 @@
+import os
+import json
+import time
+import hashlib
+import queue
+import struct
+import logging
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from app.config import Config
+from app.utils.json_records import CharacterRecord
+from app.utils.json_snapshot import is_snapshot_fresh, read_snapshot, snapshot_path_for, write_snapshot
+
+try:
+    import fcntl  # Advisory file locks, only available on POSIX systems
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+# Path to the JSON file where characters are stored
+CHARACTERS_JSON_PATH = os.path.join(os.path.dirname(__file__), '../..', 'data', 'characters.json')
+
+
+def _fsync_directory(path):
+    """
+    Flushes a directory entry to disk, so a rename inside it survives a crash.
+    """
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _file_signature(path):
+    """
+    Returns the (mtime_ns, size, inode) signature of a file, or None if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class ReadWriteLock:
+    """
+    Lock that lets any number of readers in at the same time, but gives a writer exclusive access.
+    Waiting writers block new readers, so a steady stream of reads cannot starve a write.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class PreconditionFailedError(Exception):
+    """
+    Raised by a conditional update or delete when the character no longer matches the caller's precondition.
+    """
+
+
+class _WriteBatch:
+    """
+    Mutations collected by one group commit. Changes are staged here and only become visible
+    to readers once the whole batch is durable in the journal.
+    """
+
+    def __init__(self, by_id, last_id):
+        self._by_id = by_id
+        self._pending = {}  # id -> staged record, None for a staged delete
+        self.changes = []  # (id, record or None) in the order they were staged
+        self.entries = []  # The same changes as journal entries
+        self.last_id = last_id
+
+    def get(self, character_id):
+        if character_id in self._pending:
+            return self._pending[character_id]
+        return self._by_id.get(character_id)
+
+    def next_id(self):
+        self.last_id += 1
+        return self.last_id
+
+    def put(self, record):
+        self._pending[record.id] = record
+        self.changes.append((record.id, record))
+        self.entries.append({"op": "put", "character": record.to_dict()})
+
+    def delete(self, character_id):
+        self._pending[character_id] = None
+        self.changes.append((character_id, None))
+        self.entries.append({"op": "delete", "id": character_id})
+
+
+class CharacterStore:
+    """
+    Process-wide cache of the characters stored in the JSON file.
+
+    The file is parsed once and the parsed records are kept in memory. Every read checks the files'
+    signatures (mtime, size and inode) with os.stat(), and the data is only parsed again
+    when a signature changes, e.g. after another process wrote to the store.
+    Writes made by this process refresh the cache directly, so they never trigger a re-parse.
+
+    Characters are indexed by id, so lookups, inserts and deletes are O(1) dict operations.
+    New ids come from a monotonic sequence, ids of deleted characters are never reused.
+    Characters are held as compact CharacterRecord objects and only turned into dicts when serialized.
+    Records are immutable and replaced on update, so lists handed out by `all()` never change under a reader.
+
+    Writes go to an append-only journal (`<path>.journal`, one JSON entry per line) that is fsynced before
+    the write returns, so a change costs one small append instead of re-serializing the whole file.
+    The state is the snapshot (`characters.json`) with the journal replayed on top. Once the journal holds
+    JSON_JOURNAL_COMPACT_THRESHOLD entries, a background thread writes a new snapshot to a temporary file
+    and swaps it in with an atomic rename. Replaying an entry twice is harmless, so a crash at any point
+    leaves a consistent state behind.
+
+    If a binary snapshot (`characters.bin`, see json_snapshot) exists and is at least as new as the JSON file,
+    it is loaded instead of parsing the JSON. With JSON_BINARY_SNAPSHOT enabled the store keeps it up to date.
+
+    Mutations are handed to a single writer thread. It collects the mutations arriving within
+    JSON_GROUP_COMMIT_WINDOW_MS, appends them with one write and one fsync, and then answers every caller
+    with its own result. Readers share a read/write lock and keep serving the last committed state
+    while a batch is being written, they are only held back for the moment the batch is published.
+    """
+
+    # Upper bound for the number of mutations committed together
+    MAX_BATCH_SIZE = 1000
+
+    def __init__(self, path, compact_threshold=None, group_commit_window_ms=None):
+        self.path = path
+        self.sequence_path = f"{path}.seq"
+        self.journal_path = f"{path}.journal"
+        self.binary_snapshot_path = snapshot_path_for(path)
+        self.compact_threshold = compact_threshold or Config.JSON_JOURNAL_COMPACT_THRESHOLD
+        if group_commit_window_ms is None:
+            group_commit_window_ms = Config.JSON_GROUP_COMMIT_WINDOW_MS
+        self.group_commit_window = group_commit_window_ms / 1000
+        self._rw_lock = ReadWriteLock()  # Guards the cached state below
+        self._write_mutex = threading.Lock()  # Serializes the writer thread, compaction and save()
+        self._writer_lock = threading.Lock()
+        self._writer_pid = None  # Process that started the writer thread, a forked child needs its own
+        self._queue = None
+        self._flushing = False  # While set, this process holds the file lock and the cache is authoritative
+        self._signature = None  # (snapshot signature, journal signature) the cache was built from
+        self._journal_offset = 0  # Bytes of the journal already replayed into the cache
+        self._journal_entries = 0  # Entries in the journal since the last compaction
+        self._compacting = False
+        self._by_id = None  # id -> CharacterRecord, None until the first load
+        self._characters = None  # List view of _by_id, rebuilt lazily after a write
+        self._last_id = 0  # Highest id handed out so far
+
+    def _stat_signature(self):
+        """
+        Returns the signatures of the snapshot and the journal file.
+        """
+        return _file_signature(self.path), _file_signature(self.journal_path)
+
+    def _read_file(self):
+        """
+        Parse the JSON file. If the file is empty, missing or malformed, return an empty list.
+        """
+        try:
+            with open(self.path, 'r') as file:
+                characters = json.load(file)
+                return characters if isinstance(characters, list) else []
+        except (FileNotFoundError, json.JSONDecodeError, ValueError):
+            return []  # Handle empty, missing or malformed JSON
+
+    def _read_records(self):
+        """
+        Returns the records of the snapshot, from the binary snapshot when it is fresh, otherwise parsed
+        from the JSON file (refreshing the binary snapshot if it is enabled).
+        """
+        if is_snapshot_fresh(self.binary_snapshot_path, self.path):
+            try:
+                return read_snapshot(self.binary_snapshot_path)
+            except (OSError, ValueError) as error:
+                logger.warning(f"Ignoring binary snapshot {self.binary_snapshot_path}: {error}")
+
+        records = [
+            CharacterRecord.from_dict(character) for character in self._read_file() if isinstance(character, dict)
+        ]
+        self._write_binary_snapshot(records)
+        return records
+
+    def _write_binary_snapshot(self, records):
+        """
+        Rewrites the binary snapshot when it is enabled or already in use, failures only cost the faster startup.
+        Data the format can't hold (e.g. an integer beyond 64 bits) removes the snapshot, so readers fall back
+        to the JSON file instead of an outdated snapshot.
+        """
+        if not (Config.JSON_BINARY_SNAPSHOT or os.path.exists(self.binary_snapshot_path)):
+            return
+        try:
+            write_snapshot(records, self.binary_snapshot_path)
+        except (OSError, struct.error, ValueError) as error:
+            logger.warning(f"Could not write binary snapshot {self.binary_snapshot_path}: {error}")
+            try:
+                os.remove(self.binary_snapshot_path)
+            except OSError:
+                pass
+
+    def _read_sequence(self):
+        """
+        Returns the last id stored in the sequence file, or 0 if there is none yet.
+        """
+        try:
+            with open(self.sequence_path, 'r') as file:
+                return int(file.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_atomic(self, path, data):
+        """
+        Writes `data` (bytes) to a temporary file, fsyncs it and renames it over `path`,
+        so readers and crashes only ever see the old or the new content.
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+        _fsync_directory(path)
+
+    @contextmanager
+    def _file_lock(self):
+        """
+        Holds an exclusive advisory lock shared by all processes writing to this store.
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _apply(self, entry):
+        """
+        Applies one journal entry to the cached state (must be called with the write lock held).
+        """
+        if entry.get("op") == "put":
+            self._publish(entry["character"]["id"], CharacterRecord.from_dict(entry["character"]))
+        elif entry.get("op") == "delete":
+            self._publish(entry["id"], None)
+
+    def _publish(self, character_id, record):
+        """
+        Stores (or with None, removes) a record in the cached state (must be called with the write lock held).
+        """
+        if record is None:
+            self._by_id.pop(character_id, None)
+        else:
+            self._by_id[character_id] = record
+            self._last_id = max(self._last_id, character_id)
+
+    def _replay_journal(self):
+        """
+        Applies the journal entries written since the last replay. A trailing line without newline
+        is an append that is still in progress (or was cut off by a crash) and is left for later.
+        """
+        try:
+            with open(self.journal_path, 'rb') as journal:
+                journal.seek(self._journal_offset)
+                data = journal.read()
+        except FileNotFoundError:
+            return
+
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                logger.warning(f"Skipping malformed journal entry in {self.journal_path}")
+                continue
+            self._journal_entries += 1
+        self._journal_offset += end
+
+    def _load(self, records, signature):
+        """
+        Replaces the cached state with `records` and replays the journal on top of it
+        (must be called with the write lock held).
+        """
+        self._by_id = {record.id: record for record in records}
+        # The sequence never goes backwards, even if the file was edited by hand
+        self._last_id = max(self._read_sequence(), max(self._by_id, default=0))
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self._replay_journal()
+        self._characters = None
+        self._signature = signature
+
+    def _ensure_fresh(self):
+        """
+        Reloads the state if the files changed on disk since it was cached (must be called with the write lock held).
+        When only the journal grew, just the new entries are replayed.
+        """
+        signature = self._stat_signature()
+        if self._by_id is not None and signature == self._signature:
+            return
+
+        snapshot, journal = signature
+        cached_journal = self._signature[1] if self._signature else None
+        only_journal_grew = (
+            self._by_id is not None and snapshot == self._signature[0] and journal is not None
+            and cached_journal is not None and journal[2] == cached_journal[2] and journal[1] >= self._journal_offset
+        )
+        if only_journal_grew:
+            self._replay_journal()
+            self._characters = None
+            self._signature = signature
+        else:
+            self._load(self._read_records() if snapshot else [], signature)
+
+    def _append(self, entries):
+        """
+        Appends entries to the journal with one write and one fsync (must be called with the file lock held).
+        Returns the journal size after the write.
+        """
+        data = b"".join(json.dumps(entry).encode() + b"\n" for entry in entries)
+        with open(self.journal_path, 'ab') as journal:
+            journal.write(data)
+            journal.flush()
+            os.fsync(journal.fileno())
+            return journal.tell()
+
+    def _refresh(self):
+        """
+        Makes sure the cache reflects the files on disk, reloading under the write lock if needed.
+        """
+        if self._flushing or (self._by_id is not None and self._stat_signature() == self._signature):
+            return
+        with self._rw_lock.write():
+            self._ensure_fresh()
+
+    def all(self):
+        """
+        Returns the cached list of character records, reloading it first if the files changed on disk.
+        The returned list is shared by every caller, so it must be treated as read-only.
+        """
+        characters = self._characters
+        if characters is not None and (self._flushing or self._stat_signature() == self._signature):
+            return characters
+
+        self._refresh()
+        with self._rw_lock.read():
+            characters = self._characters
+        if characters is None:
+            with self._rw_lock.write():
+                if self._characters is None:
+                    self._characters = list(self._by_id.values())
+                characters = self._characters
+        return characters
+
+    def get(self, character_id):
+        """
+        Returns the record of the character with the given id, or None if it does not exist.
+        """
+        self._refresh()
+        with self._rw_lock.read():
+            return self._by_id.get(character_id)
+
+    def version(self):
+        """
+        Returns a token that changes whenever the stored characters change (in this or another process),
+        derived from the signatures of the snapshot and journal files the cache was built from.
+        """
+        self._refresh()
+        with self._rw_lock.read():
+            return hashlib.sha1(repr(self._signature).encode()).hexdigest()[:16]
+
+    def _submit(self, mutation):
+        """
+        Queues a mutation for the writer thread and waits until it is durable.
+        `mutation` receives the current _WriteBatch and returns the caller's result.
+        Raises TimeoutError if the writer doesn't answer within JSON_WRITE_TIMEOUT seconds.
+        """
+        with self._writer_lock:
+            if self._writer_pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._writer_loop, args=(self._queue,),
+                                 name="json-store-writer", daemon=True).start()
+                self._writer_pid = os.getpid()
+            pending = self._queue
+
+        future = Future()
+        pending.put((mutation, future))
+        return future.result(timeout=Config.JSON_WRITE_TIMEOUT)
+
+    def _writer_loop(self, pending):
+        """
+        Writer thread: waits for a mutation, gathers whatever else arrives within the group commit window
+        and commits everything together.
+        """
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.group_commit_window
+            while len(batch) < self.MAX_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        """
+        Applies a batch of mutations, appends all their journal entries with a single fsync,
+        publishes the new state and resolves every caller's future.
+        """
+        results = []
+        try:
+            with self._write_mutex, self._file_lock():
+                # Pick up writes of other processes before staging on top of the current state
+                with self._rw_lock.write():
+                    self._ensure_fresh()
+
+                write_batch = _WriteBatch(self._by_id, self._last_id)
+                for mutation, future in batch:
+                    try:
+                        results.append((future, mutation(write_batch)))
+                    except Exception as error:
+                        future.set_exception(error)  # A bad mutation only fails its own request
+
+                if write_batch.entries:
+                    self._flushing = True
+                    try:
+                        journal_offset = self._append(write_batch.entries)
+                        with self._rw_lock.write():
+                            for character_id, record in write_batch.changes:
+                                self._publish(character_id, record)
+                            self._journal_offset = journal_offset
+                            self._journal_entries += len(write_batch.entries)
+                            self._characters = None
+                            self._signature = self._stat_signature()
+                    finally:
+                        self._flushing = False
+
+                needs_compaction = self._journal_entries >= self.compact_threshold and not self._compacting
+        except Exception as error:
+            logger.error(f"Committing to {self.journal_path} failed: {error}")
+            # Fails every caller of the batch, including those whose mutation never ran
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for future, result in results:
+            future.set_result(result)
+
+        if needs_compaction:
+            self._compacting = True
+            threading.Thread(target=self.compact, name="json-store-compaction", daemon=True).start()
+
+    def insert(self, character):
+        """
+        Stores a new character (a dict) under the next id of the sequence and returns its record.
+        """
+        def mutation(batch):
+            record = CharacterRecord.from_dict({**character, "id": batch.next_id()})
+            batch.put(record)
+            return record
+
+        return self._submit(mutation)
+
+    def update(self, character_id, changes, precondition=None):
+        """
+        Applies `changes` to the character with the given id and returns the updated record,
+        or None if it does not exist.
+        `precondition` (optional) is called with the current record inside the write; if it returns False
+        nothing is written and PreconditionFailedError is raised.
+        """
+        def mutation(batch):
+            record = batch.get(character_id)
+            if record is None:
+                return None
+            if precondition is not None and not precondition(record):
+                raise PreconditionFailedError(character_id)
+            updated_record = record.replace(**{**changes, "id": character_id})
+            batch.put(updated_record)
+            return updated_record
+
+        return self._submit(mutation)
+
+    def delete(self, character_id, precondition=None):
+        """
+        Removes the character with the given id. Returns False if it did not exist.
+        `precondition` works as in update().
+        """
+        def mutation(batch):
+            record = batch.get(character_id)
+            if record is None:
+                return False
+            if precondition is not None and not precondition(record):
+                raise PreconditionFailedError(character_id)
+            batch.delete(character_id)
+            return True
+
+        return self._submit(mutation)
+
+    def compact(self):
+        """
+        Folds the journal into a new snapshot of characters.json.
+        The snapshot is serialized without holding any lock, so reads and writes continue meanwhile.
+        Entries appended during serialization are carried over into the new journal.
+        """
+        try:
+            self._refresh()
+            with self._rw_lock.read():
+                characters = list(self._by_id.values())
+                last_id = self._last_id
+                journal_offset = self._journal_offset
+                snapshot, journal = self._signature
+
+            data = json.dumps([record.to_dict() for record in characters], indent=4).encode()
+
+            with self._write_mutex, self._file_lock(), self._rw_lock.write():
+                self._ensure_fresh()
+                current_snapshot, current_journal = self._signature
+                if current_snapshot != snapshot or (current_journal and journal and current_journal[2] != journal[2]):
+                    return  # Another process compacted in the meantime
+                try:
+                    with open(self.journal_path, 'rb') as journal_file:
+                        journal_file.seek(journal_offset)
+                        tail = journal_file.read()
+                except FileNotFoundError:
+                    tail = b""
+
+                self._write_atomic(self.sequence_path, str(last_id).encode())
+                self._write_atomic(self.path, data)
+                # A crash between the two renames only replays entries that are already in the snapshot
+                self._write_atomic(self.journal_path, tail)
+                self._write_binary_snapshot(characters)
+
+                self._journal_offset = len(tail)
+                self._journal_entries = tail.count(b"\n")
+                self._signature = self._stat_signature()
+        except OSError as error:
+            logger.error(f"Compacting {self.journal_path} failed: {error}")
+        finally:
+            self._compacting = False
+
+
+# Shared store used by the JSON routes and services
+character_store = CharacterStore(CHARACTERS_JSON_PATH)
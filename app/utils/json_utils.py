@@ -1,42 +1,9 @@
-import os
-import json
-from flask import jsonify
+from app.utils.json_store import character_store
 
 
-# Path to the JSON file where characters are stored
-CHARACTERS_JSON_PATH = os.path.join(os.path.dirname(__file__), '../..', 'data', 'characters.json')
-
-
-def load_characters():
-    """
-    Load characters from the JSON file. If the file is empty or missing, return an empty list.
-    """
-    # Read existing characters from the JSON file
-    if os.path.exists(CHARACTERS_JSON_PATH):
-        try:
-            with open(CHARACTERS_JSON_PATH, 'r') as file:
-                characters = json.load(file)
-                return characters if isinstance(characters, list) else []
-        except (json.JSONDecodeError, ValueError):
-            return []  # Handle empty or malformed JSON
-
-    return[]
-
-
-def save_characters(characters):
-    """
-    Save the characters list to the JSON file.
-    """
-    with open(CHARACTERS_JSON_PATH, 'w') as file:
-        json.dump(characters, file, indent=4)
-
-
-def save_and_respond(message, characters, character=None):
+def get_characters():
     """
-    Function to save changes and return a JSON response.
+    Return the cached characters from the JSON file as compact CharacterRecord objects, without copying them.
+    The list is shared across requests, so callers must not modify it (use record.to_dict() for a dict).
     """
-    save_characters(characters)
-    response = {"message": message}
-    if character:
-        response["character"] = character   # Include updated character if applicable
-    return jsonify(response), 200
+    return character_store.all()
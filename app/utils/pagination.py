@@ -1,20 +1,24 @@
+import json
+import base64
+import binascii
 from flask import request
 
 
 def get_pagination_params():
     """
     Extract and validate pagination parameters.
-    If no limit/skip is defined, return a random subset of 20 characters.
+    If no limit/skip/after is defined, return a random subset of 20 characters.
 
     Query Parameters:
     - limit: Number of characters to return (default: 20)
     - skip: Number of characters to skip (default: 0)
+    - after: Cursor returned as `next_cursor` by the previous page (keyset pagination, see get_cursor_param)
     """
     limit = request.args.get('limit', type=int, default=20)
     skip = request.args.get('skip', type=int, default=0)
 
-    # If limit and skip are completely absent, enable random selection
-    if "limit" not in request.args and "skip" not in request.args:
+    # If limit, skip and after are completely absent, enable random selection
+    if "limit" not in request.args and "skip" not in request.args and "after" not in request.args:
         return "random", None  # Special flag for random selection
 
     # Default values
@@ -27,3 +31,66 @@ def get_pagination_params():
         raise ValueError("Skip cannot be negative.")
 
     return limit, skip
+
+
+def encode_cursor(sort_by, sort_order, value, character_id):
+    """
+    Builds the opaque cursor pointing after a row: the sort field and order, the row's sort value and its id
+    (the tiebreaker that makes the position unique).
+    """
+    payload = json.dumps([sort_by, sort_order, value, character_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor created by encode_cursor() into (sort_by, sort_order, value, id).
+    Raises ValueError if the cursor was not created by this API.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_by, sort_order, value, character_id = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+
+    if not isinstance(character_id, int) or not isinstance(value, (str, int, float, type(None))):
+        raise ValueError("Invalid cursor.")
+
+    return sort_by, sort_order, value, character_id
+
+
+def get_cursor_param(sort_by, sort_order):
+    """
+    Extract and validate the `after` cursor for keyset pagination.
+    Returns (value, id) of the last row of the previous page, or None if no cursor was given.
+    The cursor must belong to the same sorting as the current request and cannot be combined with `skip`.
+    """
+    cursor = request.args.get('after', type=str)
+    if not cursor:
+        return None
+
+    if "skip" in request.args:
+        raise ValueError("Use either skip or after, not both.")
+
+    cursor_sort_by, cursor_sort_order, value, character_id = decode_cursor(cursor)
+    if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order):
+        raise ValueError("The cursor belongs to a different sort_by/sort_order.")
+
+    return value, character_id
+
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+def get_count_mode():
+    """
+    Extract and validate how the `total` of a listing is computed.
+
+    Query Parameters:
+    - count: "exact" (default) counts the filtered rows in the same query as the page,
+      "estimate" uses the database planner's row estimate, "none" skips counting (total is null)
+    """
+    count_mode = request.args.get('count', type=str, default="exact").lower()
+    if count_mode not in COUNT_MODES:
+        raise ValueError(f"Invalid value for count. Must be one of: {', '.join(COUNT_MODES)}.")
+    return count_mode
@@ -0,0 +1,72 @@
+import logging
+import threading
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+# Query counters of the `count_queries()` blocks active in the current thread
+_local = threading.local()
+
+
+class TooManyQueriesError(AssertionError):
+    """
+    Raised when a request or a guarded block issues more SQL statements than allowed.
+    """
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    """
+    Counts every statement sent to any database, per request and per active count_queries() block.
+    """
+    if has_request_context():
+        g.query_count = g.get("query_count", 0) + 1
+    for counter in getattr(_local, "counters", ()):
+        counter.append(statement)
+
+
+@contextmanager
+def count_queries(max_queries=None):
+    """
+    Collects the SQL statements issued inside the block (by the current thread) into the yielded list.
+    With `max_queries`, raises TooManyQueriesError if the block issued more statements, e.g. in a test:
+
+        with count_queries(max_queries=2):
+            client.get("/characters/list?limit=50")
+    """
+    statements = []
+    counters = _local.__dict__.setdefault("counters", [])
+    counters.append(statements)
+    try:
+        yield statements
+    finally:
+        counters.remove(statements)
+
+    if max_queries is not None and len(statements) > max_queries:
+        raise TooManyQueriesError(
+            f"Expected at most {max_queries} queries, got {len(statements)}:\n" + "\n".join(statements)
+        )
+
+
+def register_query_guard(app):
+    """
+    Fails every request that issues more than MAX_QUERIES_PER_REQUEST statements (if configured),
+    so an N+1 regression breaks the test suite instead of slowing down production.
+    """
+    max_queries = app.config.get("MAX_QUERIES_PER_REQUEST")
+    if not max_queries:
+        return
+
+    @app.after_request
+    def check_query_count(response):
+        query_count = g.get("query_count", 0)
+        if query_count > max_queries:
+            message = f"{request.method} {request.full_path} issued {query_count} queries (limit {max_queries})"
+            logger.error(message)
+            raise TooManyQueriesError(message)
+        return response
+
@@ -0,0 +1,105 @@
+import json
+from app import db
+from app.models.character_model import CharacterRead
+from app.utils.filters import apply_filters
+from app.utils.sorting import ALLOWED_SORT_FIELDS, apply_sorting
+
+
+# Representative values for every filter of get_filter_params(), one listing is checked per filter and sort field
+PLAN_CHECK_FILTERS = [
+    {},
+    {"house_id": 1},
+    {"strength_id": 1},
+    {"age": 30},
+    {"age_more_than": 20, "age_less_than": 40},
+    {"house": "stark"},
+    {"strength": "cunning"},
+    {"name": "jon"},
+    {"role": "king"},
+    {"animal": "wolf"},
+]
+
+# Substring (ilike '%value%') filters need pg_trgm indexes (migrations 0002/0004), which only exist on PostgreSQL
+SUBSTRING_FILTERS = {"name", "role", "animal", "house", "strength"}
+
+
+def build_listing_query(filters, sort_by, sort_order="asc", limit=20):
+    """
+    Builds the page query of list_characters() for a filter/sort combination.
+    """
+    query = apply_filters(CharacterRead.query, filters)
+    return apply_sorting(query, sort_by, sort_order).limit(limit + 1)
+
+
+def explain(query):
+    """
+    Returns the plan of a query as a list of nodes (dicts with "operation", "relation" and "index").
+    On PostgreSQL sequential scans are disabled for the EXPLAIN, so a Seq Scan only shows up when no index
+    can answer the query, independently of the table size.
+    """
+    connection = db.session.connection()
+    statement = query.statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", statement.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        nodes = []
+        pending = [plan[0]["Plan"]]
+        while pending:
+            node = pending.pop()
+            nodes.append({
+                "operation": node["Node Type"],
+                "relation": node.get("Relation Name"),
+                "index": node.get("Index Name"),
+            })
+            pending.extend(node.get("Plans", []))
+        return nodes
+
+    # SQLite: EXPLAIN QUERY PLAN rows read "SCAN characters", "SEARCH characters USING INDEX ix (...)", ...
+    params = [statement.params[name] for name in statement.positiontup]
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", tuple(params)).all()
+    nodes = []
+    for row in rows:
+        detail = row[-1]
+        words = [word for word in detail.split() if word != "TABLE"]  # Older versions print "SCAN TABLE x"
+        index = detail.split(" INDEX ", 1)[1].split()[0] if " INDEX " in detail else None
+        nodes.append({
+            "operation": detail,
+            "relation": words[1] if words[0] in ("SCAN", "SEARCH") and len(words) > 1 else None,
+            "index": index,
+        })
+    return nodes
+
+
+def is_full_scan(node):
+    """
+    True if the plan node reads the whole character_read table (which listings query) instead of using an index.
+    """
+    if node["relation"] != CharacterRead.__tablename__:
+        return False
+    if db.session.connection().dialect.name == "postgresql":
+        return node["operation"] == "Seq Scan"
+    return node["operation"].startswith("SCAN") and node["index"] is None
+
+
+def check_query_plans():
+    """
+    Explains the listing query of every filter/sort combination and returns one result per combination:
+    (filters, sort_by, full_scan, plan nodes). Substring filters are only checked on PostgreSQL.
+    Runs in a transaction that is rolled back, so settings changed for the EXPLAIN don't leak.
+    """
+    results = []
+    check_substring = db.session.connection().dialect.name == "postgresql"
+    try:
+        for filters in PLAN_CHECK_FILTERS:
+            if not check_substring and SUBSTRING_FILTERS & filters.keys():
+                continue
+            for sort_by in sorted(ALLOWED_SORT_FIELDS):
+                nodes = explain(build_listing_query(filters, sort_by))
+                results.append((filters, sort_by, any(is_full_scan(node) for node in nodes), nodes))
+    finally:
+        db.session.rollback()
+    return results
@@ -0,0 +1,194 @@
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models.character_model import Character, CharacterRead, DatasetGeneration, House, Strength
+
+
+# Columns of character_read, in the order read_rows_select() returns them
+READ_COLUMNS = [
+    "id", "name", "house_id", "house_name", "animal", "symbol", "nickname", "role", "age", "death",
+    "strength_id", "strength_description"
+]
+
+# Characters refreshed per statement, keeps IN lists below the bound parameter limits
+REFRESH_BATCH_SIZE = 500
+
+# Names of the datasets in dataset_generations: characters (with their house and strength names), and the
+# houses and strengths tables themselves (see app/utils/dimensions.py)
+CHARACTERS_DATASET = "characters"
+DIMENSIONS_DATASET = "dimensions"
+
+
+def dialect_insert(connection):
+    """
+    Returns the insert() of the connection's dialect when it supports ON CONFLICT (PostgreSQL and SQLite),
+    None for other databases.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        return postgresql_insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert
+    return None
+
+
+def bump_generation(connection, name=CHARACTERS_DATASET):
+    """
+    Advances the generation of a dataset (the counter listing ETags are built from), creating its row if needed
+    with a single upsert, so concurrent first writers don't race on the INSERT.
+
+    Runs in the caller's transaction, so the new generation becomes visible together with the change and a
+    listing is never cached under a generation whose data it doesn't contain. The price is that the dataset's
+    row stays locked from the bump until the commit, so writers of the same dataset commit one after the other.
+    Callers therefore bump after their other statements (imports and syncs once, at the end of the run) to keep
+    that window short.
+    """
+    table = DatasetGeneration.__table__
+    upsert = dialect_insert(connection)
+    if upsert is not None:
+        connection.execute(
+            upsert(table).values(name=name, generation=1)
+            .on_conflict_do_update(index_elements=[table.c.name], set_={"generation": table.c.generation + 1})
+        )
+        return
+
+    result = connection.execute(
+        update(table).where(table.c.name == name).values(generation=table.c.generation + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(name=name, generation=1))
+
+
+def read_rows_select():
+    """
+    SELECT producing character_read rows from characters, houses and strengths.
+    """
+    return select(
+        Character.id, Character.name, Character.house_id, House.name, Character.animal, Character.symbol,
+        Character.nickname, Character.role, Character.age, Character.death,
+        Character.strength_id, Strength.description
+    ).select_from(Character).outerjoin(House, Character.house_id == House.id) \
+        .outerjoin(Strength, Character.strength_id == Strength.id)
+
+
+def refresh_read_rows(connection, character_ids):
+    """
+    Rewrites the character_read rows of the given characters from the current characters table and advances
+    the dataset generation. Characters that no longer exist lose their row. Used after writes that bypass the
+    session (bulk statements), session writes are synced by the after_flush listener.
+    """
+    character_ids = sorted(set(character_ids))
+    read_table = CharacterRead.__table__
+    for start in range(0, len(character_ids), REFRESH_BATCH_SIZE):
+        batch = character_ids[start:start + REFRESH_BATCH_SIZE]
+        connection.execute(delete(read_table).where(read_table.c.id.in_(batch)))
+        rows = read_rows_select().where(Character.id.in_(batch))
+        connection.execute(insert(read_table).from_select(READ_COLUMNS, rows))
+    bump_generation(connection)
+
+
+def write_read_row(connection, values):
+    """
+    Stores the character_read row of one character from values that are already known (e.g. the RETURNING row
+    of its UPDATE, with house_name and strength_description), with a single UPDATE instead of
+    refresh_read_rows()' DELETE + INSERT ... SELECT. Advances the dataset generation.
+    """
+    read_table = CharacterRead.__table__
+    connection.execute(
+        update(read_table).where(read_table.c.id == values["id"])
+        .values({column: values[column] for column in READ_COLUMNS if column != "id"})
+    )
+    bump_generation(connection)
+
+
+def remove_read_rows(connection, character_ids):
+    """
+    Removes the character_read rows of deleted characters and advances the dataset generation.
+    """
+    read_table = CharacterRead.__table__
+    character_ids = sorted(set(character_ids))
+    for start in range(0, len(character_ids), REFRESH_BATCH_SIZE):
+        batch = character_ids[start:start + REFRESH_BATCH_SIZE]
+        connection.execute(delete(read_table).where(read_table.c.id.in_(batch)))
+    bump_generation(connection)
+
+
+def rebuild_read_model(connection):
+    """
+    Rebuilds the whole character_read table, e.g. after loading data with db.create_all() or raw SQL.
+    Returns the number of rows.
+    """
+    read_table = CharacterRead.__table__
+    connection.execute(delete(read_table))
+    connection.execute(insert(read_table).from_select(READ_COLUMNS, read_rows_select()))
+    bump_generation(connection)
+    return connection.execute(select(db.func.count()).select_from(read_table)).scalar()
+
+
+def _sync_read_model(session, flush_context):
+    """
+    after_flush listener: applies the flushed character, house and strength changes to character_read
+    in the same transaction, so the read model commits (or rolls back) together with the write.
+    A renamed house or strength changes the representation of its characters, so their version is bumped too.
+    """
+    changed_ids = set()
+    deleted_ids = set()
+    renamed_houses = []
+    renamed_strengths = []
+    new_dimensions = False
+
+    for obj in session.new:
+        if isinstance(obj, Character):
+            changed_ids.add(obj.id)
+        elif isinstance(obj, (House, Strength)):
+            new_dimensions = True
+
+    for obj in session.dirty:
+        if isinstance(obj, Character):
+            changed_ids.add(obj.id)
+        elif isinstance(obj, House):
+            renamed_houses.append((obj.id, obj.name))
+        elif isinstance(obj, Strength):
+            renamed_strengths.append((obj.id, obj.description))
+
+    for obj in session.deleted:
+        if isinstance(obj, Character):
+            deleted_ids.add(obj.id)
+        elif isinstance(obj, House):
+            renamed_houses.append((obj.id, None))
+        elif isinstance(obj, Strength):
+            renamed_strengths.append((obj.id, None))
+
+    if not (changed_ids or deleted_ids or renamed_houses or renamed_strengths or new_dimensions):
+        return
+
+    connection = session.connection()
+    read_table = CharacterRead.__table__
+    characters = Character.__table__
+    # Characters updated in this flush already got their new version from the ORM
+    unchanged = characters.c.id.notin_(changed_ids)
+    for house_id, name in renamed_houses:
+        connection.execute(update(read_table).where(read_table.c.house_id == house_id).values(house_name=name))
+        connection.execute(update(characters).where(characters.c.house_id == house_id, unchanged)
+                           .values(version=characters.c.version + 1))
+    for strength_id, description in renamed_strengths:
+        connection.execute(
+            update(read_table).where(read_table.c.strength_id == strength_id).values(strength_description=description)
+        )
+        connection.execute(update(characters).where(characters.c.strength_id == strength_id, unchanged)
+                           .values(version=characters.c.version + 1))
+    # Deleted characters are no longer in the characters table, so refreshing them drops their rows
+    refresh_read_rows(connection, changed_ids | deleted_ids)
+    if new_dimensions or renamed_houses or renamed_strengths:
+        bump_generation(connection, DIMENSIONS_DATASET)
+        session.info["dimensions_changed"] = True  # Drops the process' dimension cache after the commit
+
+
+def register_read_model_sync():
+    """
+    Keeps character_read in sync with every session flush (registered once, for all sessions).
+    """
+    if not event.contains(Session, "after_flush", _sync_read_model):
+        event.listen(Session, "after_flush", _sync_read_model)
@@ -0,0 +1,139 @@
+import json
+import threading
+from flask import current_app
+from app.config import Config
+from app.utils.cache import TTLCache
+
+
+def normalize_params(params):
+    """
+    Serializes parsed request parameters into a canonical string (sorted keys, sets as sorted lists), so
+    equivalent query strings (different order, spacing, defaults) produce the same string.
+    """
+    return json.dumps(params, sort_keys=True, default=sorted, separators=(",", ":"))
+
+
+class MemoryCacheBackend(TTLCache):
+    """
+    In-process backend of the response cache: a bounded LRU with TTL, plus counters that never expire.
+    """
+
+    def __init__(self, max_size=1024, ttl=60):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self._counters = {}
+        self._counter_lock = threading.Lock()
+
+    def counter(self, key):
+        return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._counter_lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisCacheBackend:
+    """
+    Shared backend of the response cache, so all workers see the same entries and invalidations.
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url, ttl=60, prefix="got_api:"):
+        import redis  # Optional dependency, only needed when RESPONSE_CACHE_URL is set
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key, default=None):
+        value = self.client.get(self.prefix + key)
+        return default if value is None else value
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, value, px=int((self.ttl if ttl is None else ttl) * 1000))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+
+class ResponseCache:
+    """
+    Caches the encoded JSON bodies of list responses.
+
+    Entries are grouped by namespace ("db" for /characters/list, "json" for /characters/json). Keys carry the
+    version of the data the listing was read from (the same one its ETag is built from), so a write by any
+    process, the CLI or an external edit of the JSON files makes the old entries unreachable, and a cached body
+    is always served with the ETag of the data it contains. Every namespace also has a generation counter that
+    the write handlers bump after their change is stored (shared by all workers with the Redis backend).
+
+    Any object with get/set/delete/counter/incr can be used as the backend (see MemoryCacheBackend).
+    """
+
+    def __init__(self, backend=None, ttl=None):
+        self.ttl = Config.RESPONSE_CACHE_TTL if ttl is None else ttl
+        self.backend = backend
+        self._lock = threading.Lock()
+
+    def _backend(self):
+        """
+        The configured backend, created on first use: Redis when RESPONSE_CACHE_URL is set, else in-process.
+        """
+        if self.backend is None:
+            with self._lock:
+                if self.backend is None:
+                    if Config.RESPONSE_CACHE_URL:
+                        self.backend = RedisCacheBackend(Config.RESPONSE_CACHE_URL, ttl=self.ttl)
+                    else:
+                        self.backend = MemoryCacheBackend(max_size=Config.RESPONSE_CACHE_SIZE, ttl=self.ttl)
+        return self.backend
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def key(self, namespace, version, **params):
+        """
+        Builds the cache key of a listing from the version of its data (dataset generation or JSON store version)
+        and its parsed parameters (filters, sorting, pagination, ...), so equivalent query strings share one entry.
+        Returns None for requests that must not be cached (random samples).
+        """
+        if not self.enabled or params.get("limit") == "random":
+            return None
+        normalized = normalize_params(params)
+        generation = self._backend().counter(f"{namespace}:generation")
+        return f"{namespace}:{generation}:{version}:{normalized}"
+
+    def get(self, key):
+        """
+        Returns a response with the cached body, or None on a miss.
+        """
+        if key is None:
+            return None
+        body = self._backend().get(key)
+        if body is None:
+            return None
+        return current_app.response_class(body, mimetype=current_app.json.mimetype)
+
+    def set(self, key, response):
+        """
+        Stores the body of a successful response under `key`.
+        """
+        if key is not None and response.status_code == 200:
+            self._backend().set(key, response.get_data())
+        return response
+
+    def invalidate(self, namespace):
+        """
+        Drops all cached responses of a namespace, called by the write handlers after a change is stored.
+        """
+        if self.enabled:
+            self._backend().incr(f"{namespace}:generation")
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,85 @@
+import math
+import random
+from itertools import islice
+from sqlalchemy import func
+from app.models.character_model import CharacterRead
+
+
+# Filtered sets up to this size are small enough to simply shuffle in the database
+SMALL_SAMPLE_POPULATION = 1000
+
+# Rounds of id probing before falling back to ORDER BY random() for the missing rows
+MAX_PROBE_ROUNDS = 4
+
+# Upper bound of candidate ids sent in one probe
+MAX_PROBE_SIZE = 2000
+
+
+def sample_query(query, size, population):
+    """
+    Returns up to `size` random rows of a (filtered, unsorted) character_read query without sorting the whole table.
+
+    `population` is the (estimated) number of rows matched by the query. Small sets are shuffled with
+    ORDER BY random(). Larger ones are sampled by id-range probing: random ids between the smallest and
+    largest matching id are looked up through the primary key (`id IN (...)`), with as many candidates as the
+    density of matching ids suggests. The cost depends on the sample size, not on the size of the table.
+    """
+    if population <= SMALL_SAMPLE_POPULATION:
+        return query.order_by(func.random()).limit(size).all()
+
+    low, high = query.order_by(None).with_entities(func.min(CharacterRead.id), func.max(CharacterRead.id)).one()
+    if low is None:
+        return []
+
+    span = high - low + 1
+    density = min(1.0, population / span)
+    picked = {}
+
+    for _ in range(MAX_PROBE_ROUNDS):
+        missing = size - len(picked)
+        if missing <= 0:
+            break
+        probe_size = min(span, MAX_PROBE_SIZE, math.ceil(missing / density * 1.5) + 5)
+        candidates = random.sample(range(low, high + 1), probe_size)
+        for character in query.filter(CharacterRead.id.in_(candidates)).all():
+            picked.setdefault(character.id, character)
+
+    characters = list(picked.values())
+    random.shuffle(characters)
+    if len(characters) < size:
+        # Matching ids are too sparse for probing, shuffle the remaining ones in the database
+        rest = query.filter(CharacterRead.id.notin_(picked)) if picked else query
+        characters.extend(rest.order_by(func.random()).limit(size - len(characters)).all())
+    return characters[:size]
+
+
+def _uniform():
+    """
+    Random float in the open interval (0, 1), safe to pass to log().
+    """
+    return random.random() or 0.5
+
+
+def reservoir_sample(items, size):
+    """
+    Picks `size` random items from an iterable in a single pass, without copying or sorting it
+    (reservoir sampling, "Algorithm L": after the reservoir is full, whole runs of items are skipped).
+    """
+    iterator = iter(items)
+    reservoir = list(islice(iterator, size))
+    if len(reservoir) < size or size <= 0:
+        random.shuffle(reservoir)
+        return reservoir
+
+    end = object()
+    weight = math.exp(math.log(_uniform()) / size)
+    while True:
+        skip = math.floor(math.log(_uniform()) / math.log(1 - weight))
+        item = next(islice(iterator, skip, None), end)
+        if item is end:
+            break
+        reservoir[random.randrange(size)] = item
+        weight *= math.exp(math.log(_uniform()) / size)
+
+    random.shuffle(reservoir)
+    return reservoir
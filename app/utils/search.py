@@ -0,0 +1,126 @@
+import re
+import threading
+from flask import request
+from sqlalchemy import and_, case, column, func, inspect, literal_column, or_, select, table
+from app import db
+from app.models.character_model import Character, CharacterRead
+
+
+MAX_SEARCH_LENGTH = 100  # Prevents excessively long search terms
+
+# Character columns covered by free-text search, must match the search index of migration 0002
+SEARCH_COLUMNS = (
+    CharacterRead.name, CharacterRead.nickname, CharacterRead.role, CharacterRead.animal, CharacterRead.symbol
+)
+
+# FTS5 table created by migration 0002 on SQLite (rowid = characters.id)
+characters_fts = table("characters_fts", column("rowid"))
+
+_index_available = {}
+_index_lock = threading.Lock()
+
+
+def get_search_param():
+    """
+    Extract and validate the free-text search parameter `q`.
+    Returns the stripped search string, or None if no search was requested.
+    """
+    search = request.args.get('q', type=str)
+    if not search or not search.strip():
+        return None
+
+    search = search.strip()
+    if len(search) > MAX_SEARCH_LENGTH:
+        raise ValueError(f"Invalid value for q. Max length is {MAX_SEARCH_LENGTH} characters.")
+    if not search_terms(search):
+        raise ValueError("Invalid value for q. Must contain at least one word.")
+
+    return search
+
+
+def search_terms(search):
+    """
+    Splits a search string into lowercase words, dropping punctuation and search operators.
+    """
+    return [term.lower() for term in re.findall(r"\w+", search)]
+
+
+def search_index_available():
+    """
+    Checks once per database whether the search index of migration 0002 exists (the tsvector column on
+    PostgreSQL, the FTS5 table on SQLite). Databases created with db.create_all() don't have it.
+    """
+    engine = db.engine
+    key = str(engine.url)
+    available = _index_available.get(key)
+    if available is None:
+        with _index_lock:
+            inspector = inspect(engine)
+            if engine.dialect.name == "postgresql":
+                available = any(c["name"] == "search_vector" for c in inspector.get_columns("characters"))
+            elif engine.dialect.name == "sqlite":
+                available = inspector.has_table("characters_fts")
+            else:
+                available = False
+            _index_available[key] = available
+    return available
+
+
+def _fts5_query(search):
+    """
+    Builds an FTS5 MATCH expression: every word must match the start of a word ("jon" finds "Jon" and "Jonos").
+    Words are quoted, so user input can't inject FTS5 syntax.
+    """
+    return " ".join(f'"{term}"*' for term in search_terms(search))
+
+
+def search_condition(search):
+    """
+    Returns the WHERE condition selecting the character_read rows whose character matches the free-text search.
+    The search index belongs to the characters table and is joined by id (character_read.id = characters.id).
+
+    - PostgreSQL: `id IN (SELECT id FROM characters WHERE search_vector @@ websearch_to_tsquery(...))`,
+      answered by the GIN index
+    - SQLite: `id IN (SELECT rowid FROM characters_fts WHERE characters_fts MATCH ...)`
+    - without the search index: every word must occur (ilike) in one of the search columns
+    """
+    dialect = db.engine.dialect.name
+    if search_index_available() and dialect == "postgresql":
+        vector = literal_column("characters.search_vector")
+        return CharacterRead.id.in_(
+            select(Character.id).where(vector.op("@@")(func.websearch_to_tsquery("simple", search)))
+        )
+
+    if search_index_available() and dialect == "sqlite":
+        return CharacterRead.id.in_(
+            select(characters_fts.c.rowid).where(literal_column("characters_fts").op("MATCH")(_fts5_query(search)))
+        )
+
+    return and_(*(
+        or_(*(search_column.ilike(f"%{term}%") for search_column in SEARCH_COLUMNS))
+        for term in search_terms(search)
+    ))
+
+
+def search_rank(search):
+    """
+    Returns the relevance of a character for the search, higher is more relevant (used with sort_by=relevance).
+
+    - PostgreSQL: ts_rank() of the search vector
+    - SQLite: the negated bm25() score of the FTS5 table (bm25 is lower for better matches)
+    - without the search index: 1 if the name contains the first word, else 0
+    """
+    dialect = db.engine.dialect.name
+    if search_index_available() and dialect == "postgresql":
+        vector = literal_column("characters.search_vector")
+        return select(func.ts_rank(vector, func.websearch_to_tsquery("simple", search))).where(
+            Character.id == CharacterRead.id
+        ).scalar_subquery()
+
+    if search_index_available() and dialect == "sqlite":
+        return select(-func.bm25(literal_column("characters_fts"))).where(
+            literal_column("characters_fts").op("MATCH")(_fts5_query(search)),
+            characters_fts.c.rowid == CharacterRead.id
+        ).scalar_subquery()
+
+    return case((CharacterRead.name.ilike(f"%{search_terms(search)[0]}%"), 1), else_=0)
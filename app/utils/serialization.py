@@ -0,0 +1,19 @@
+from app.schemas.character_schema import character_response_adapter, character_list_response_adapter
+
+
+def serialize_character(character):
+    """
+    Returns the response dict of a character (a Character with house and strength loaded), produced through
+    CharacterResponseSchema, so the response is checked against the documented contract.
+    """
+    validated = character_response_adapter.validate_python(character, from_attributes=True)
+    return character_response_adapter.dump_python(validated, mode="json")
+
+
+def serialize_characters_json(characters):
+    """
+    Returns a list of characters encoded as a JSON array (bytes), validated and serialized by pydantic-core
+    in one call through TypeAdapter(list[CharacterResponseSchema]).
+    """
+    validated = character_list_response_adapter.validate_python(characters, from_attributes=True)
+    return character_list_response_adapter.dump_json(validated)
@@ -0,0 +1,58 @@
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError
+
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller (the leader) runs the function, callers
+    arriving while it runs wait for it and receive the same result, or the same exception.
+
+    Waiting is bounded by a timeout (per call, defaulting to the instance's). A caller whose wait times out
+    runs the function itself, so a stuck leader slows its followers down but never fails them.
+    Results are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, timeout=5):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> Future of the in-flight call
+
+    def do(self, key, fn, timeout=None):
+        """
+        Returns fn(), sharing the result with concurrent callers that pass the same key.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if timeout <= 0:
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+
+        if not leader:
+            try:
+                return call.result(timeout)
+            except TimeoutError:
+                logger.warning(f"Waited {timeout}s for an in-flight call, running it again: {key}")
+                return fn()
+
+        try:
+            result = fn()
+        except Exception as error:
+            call.set_exception(error)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            if not call.done():  # Interrupted by a BaseException, release the followers with their own call
+                call.set_exception(TimeoutError())
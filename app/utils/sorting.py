@@ -1,63 +1,106 @@
 from flask import request
-from sqlalchemy import asc, desc
-from app.models.character_model import Character, House, Strength
+from sqlalchemy import and_, asc, desc, or_
+from app.models.character_model import CharacterRead
 
 
 ALLOWED_SORT_FIELDS = {"name", "age", "house", "role", "nickname", "animal", "symbol", "death", "strength"}
 
+# Map of sort fields to their columns in the character_read table, which carries the house and strength inline
+SORT_COLUMNS = {
+    "name": CharacterRead.name,
+    "age": CharacterRead.age,
+    "house": CharacterRead.house_name,
+    "role": CharacterRead.role,
+    "nickname": CharacterRead.nickname,
+    "animal": CharacterRead.animal,
+    "symbol": CharacterRead.symbol,
+    "death": CharacterRead.death,
+    "strength": CharacterRead.strength_description
+}
 
-def get_sorting_params():
-    """Extract and validate sorting parameters from the request arguments."""
 
-    sort_by = request.args.get('sort_by', type=str, default="name")
-    sort_order = request.args.get('sort_order', type=str, default="asc").lower()
+def get_sorting_params(search=None):
+    """
+    Extract and validate sorting parameters from the request arguments.
+    With a free-text `search` (q=), results are sorted by relevance, best matches first, unless sort_by is given.
+    """
+    sort_by = request.args.get('sort_by', type=str, default="relevance" if search else "name")
 
-    if sort_by not in ALLOWED_SORT_FIELDS:
+    if sort_by not in ALLOWED_SORT_FIELDS and not (sort_by == "relevance" and search):
         sort_by = "name"  # Default if invalid field is given
 
+    default_sort_order = "desc" if sort_by == "relevance" else "asc"
+    sort_order = request.args.get('sort_order', type=str, default=default_sort_order).lower()
+
     if sort_order not in ["asc", "desc"]:
-        sort_order = "asc"
+        sort_order = default_sort_order
 
     return sort_by, sort_order
 
 
 def apply_sorting(query, sort_by, sort_order):
     """
-    Modify an existing query object by dynamically adding sorting and joins based on the sort_by and sort_order
+    Modify an existing query object by dynamically adding sorting based on the sort_by and sort_order
     parameters. The query object is created earlier in the code, and passed into this function as an argument.
-    The Character model has a relationship with the House and Strength models. When sorting by either of these fields,
-    need to perform a SQL join between the Character table and the related table (House or Strength)
-    in order to access the field it is sorted by.
+    The query selects from the character_read table, where the house name and strength description are plain
+    columns, so sorting by house or strength needs no join.
     """
     if sort_by not in ALLOWED_SORT_FIELDS:
         # sort_by - the column name passed by the user
         return query  # If the sorting field is not recognized, return the query unchanged
 
-    # Map of sort fields to their corresponding columns (and optional joins)
-    sort_fields = {
-        "name": Character.name,
-        "age": Character.age,
-        "house": House.name,
-        "role": Character.role,
-        "nickname": Character.nickname,
-        "animal": Character.animal,
-        "symbol": Character.symbol,
-        "death": Character.death,
-        "strength": Strength.description
-    }
     # Check if the field exists in the map
-    if sort_by not in sort_fields:
+    if sort_by not in SORT_COLUMNS:
         return query  # If field is not found, return query unchanged
 
-    # Determine the sorting function
-    sort_func = asc if sort_order == "asc" else desc
+    # Apply the sorting
+    return order_by_column(query, SORT_COLUMNS[sort_by], sort_order)
+
 
-    # If sorting by 'house' or 'strength', perform the join first
-    if sort_by in ["house", "strength"]:
-        # conditional expression
-        query = query.join(House if sort_by == "house" else Strength)
+def order_by_column(query, column, sort_order):
+    """
+    Orders the query by `column` and then by id, so rows with the same value keep a stable order between requests.
+    NULLs come last in ascending and first in descending order (PostgreSQL's default, made explicit for other
+    databases), which is the order keyset pagination relies on.
+    """
+    if sort_order == "asc":
+        return query.order_by(asc(column).nulls_last(), asc(CharacterRead.id))
+    return query.order_by(desc(column).nulls_first(), desc(CharacterRead.id))
 
-    # Apply the sorting
-    return query.order_by(sort_func(sort_fields[sort_by]))
-    # query = query.order_by(sort_func(Strength.description))  # Sorting by strength description
-    # query = query.order_by(sort_func(House.name))  # Sorting by house name
+
+def apply_keyset_sorting(query, sort_by, sort_order, after=None):
+    """
+    Sorts the query like apply_sorting(), for keyset (cursor) pagination.
+    If `after` (the (value, id) of the last row of the previous page) is given, only rows that come after it
+    are selected, so the database can seek straight to the page instead of skipping over all previous rows.
+    """
+    if sort_by not in SORT_COLUMNS:
+        sort_by = "name"
+    column = SORT_COLUMNS[sort_by]
+
+    if after is not None:
+        query = query.filter(keyset_condition(column, sort_order, after))
+
+    return order_by_column(query, column, sort_order)
+
+
+def keyset_condition(column, sort_order, after):
+    """
+    Returns the condition selecting the rows that come after `after` (the (value, id) of the last row of the
+    previous page) in the order of order_by_column(). `column` can be any sortable expression.
+    """
+    value, last_id = after
+    if sort_order == "asc":
+        # ... value ..., id ... | NULLs
+        if value is None:
+            return and_(column.is_(None), CharacterRead.id > last_id)
+        return or_(
+            column > value,
+            and_(column == value, CharacterRead.id > last_id),
+            column.is_(None)
+        )
+
+    # NULLs | ... value ..., id ... (both descending)
+    if value is None:
+        return or_(column.isnot(None), and_(column.is_(None), CharacterRead.id < last_id))
+    return or_(column < value, and_(column == value, CharacterRead.id < last_id))
@@ -0,0 +1,72 @@
+import sys
+import json
+import time
+import statistics
+from sqlalchemy.orm import joinedload
+from app import create_app
+from app.models.character_model import Character
+from app.services.character_db_service import build_fieldset_query
+from app.utils.fieldsets import FULL_CHARACTER_FIELDS
+from app.utils.json_provider import dumps_bytes
+from app.utils.serialization import serialize_characters_json
+
+
+# Initialize the app (uses the database configured by DATABASE_URL)
+app = create_app()
+
+
+def with_lookups(query):
+    """
+    Loads each character's house and strength in the same SELECT (LEFT OUTER JOINs).
+    """
+    return query.options(joinedload(Character.house), joinedload(Character.strength))
+
+
+def to_dict_and_json(limit):
+    """
+    The original list path: Character objects with house/strength, to_dict() per row, stdlib json.
+    """
+    characters = with_lookups(Character.query).order_by(Character.id).limit(limit).all()
+    return json.dumps([character.to_dict() for character in characters], sort_keys=True, separators=(",", ":")).encode()
+
+
+def response_schema(limit):
+    """
+    Character objects validated and serialized by TypeAdapter(list[CharacterResponseSchema]) in pydantic-core.
+    """
+    characters = with_lookups(Character.query).order_by(Character.id).limit(limit).all()
+    return serialize_characters_json(characters)
+
+
+def row_tuples(limit):
+    """
+    The current list path: plain character_read tuples shaped into dicts, encoded with orjson.
+    """
+    query, serialize = build_fieldset_query(FULL_CHARACTER_FIELDS)
+    rows = query.order_by("id").limit(limit).all()
+    return dumps_bytes([serialize(row) for row in rows])
+
+
+def run_benchmark(limit=1000, repeat=20):
+    """
+    Times each serialization path (query included) for a page of `limit` characters and prints the median.
+    """
+    with app.app_context():
+        print(f"{limit} characters per page, median of {repeat} runs")
+        for name, path in [("to_dict + json", to_dict_and_json),
+                           ("CharacterResponseSchema (TypeAdapter)", response_schema),
+                           ("character_read tuples + orjson", row_tuples)]:
+            path(limit)  # Warm up (compiles the statement and the pydantic schema)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                body = path(limit)
+                timings.append(time.perf_counter() - start)
+            print(f"  {name:40} {statistics.median(timings) * 1000:8.1f} ms  {len(body)} bytes")
+
+
+if __name__ == "__main__":
+    """
+    Usage: python benchmark_serialization.py [limit] [repeat]
+    """
+    run_benchmark(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,59 @@
+"""initial schema: houses, strengths and characters
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 09:00:00.000000
+
+Databases created before migrations were tracked already have these tables,
+mark them as migrated with `flask db stamp 0001` before running `flask db upgrade`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'houses',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_table(
+        'strengths',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('description', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('description')
+    )
+    op.create_table(
+        'characters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('house_id', sa.Integer(), nullable=True),
+        sa.Column('animal', sa.String(length=50), nullable=True),
+        sa.Column('symbol', sa.String(length=50), nullable=True),
+        sa.Column('nickname', sa.String(length=50), nullable=True),
+        sa.Column('role', sa.String(length=100), nullable=False),
+        sa.Column('age', sa.Integer(), nullable=True),
+        sa.Column('death', sa.Integer(), nullable=True),
+        sa.Column('strength_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['house_id'], ['houses.id']),
+        sa.ForeignKeyConstraint(['strength_id'], ['strengths.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('characters')
+    op.drop_table('strengths')
+    op.drop_table('houses')
@@ -0,0 +1,89 @@
+"""search indexes for substring filters and free-text search (q=)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 10:00:00.000000
+
+PostgreSQL:
+- pg_trgm GIN indexes, so the ilike('%value%') filters on characters.name/role/animal,
+  houses.name and strengths.description no longer need a sequential scan
+- a generated tsvector column (characters.search_vector) with a GIN index for ranked free-text search
+
+SQLite (local development and tests):
+- an FTS5 table (characters_fts) over the same columns, kept in sync by triggers
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, column) of the trigram indexes
+TRIGRAM_INDEXES = [
+    ('ix_characters_name_trgm', 'characters', 'name'),
+    ('ix_characters_role_trgm', 'characters', 'role'),
+    ('ix_characters_animal_trgm', 'characters', 'animal'),
+    ('ix_houses_name_trgm', 'houses', 'name'),
+    ('ix_strengths_description_trgm', 'strengths', 'description'),
+]
+
+# Character columns covered by free-text search, must match SEARCH_COLUMNS in app/utils/search.py
+SEARCH_COLUMNS = ['name', 'nickname', 'role', 'animal', 'symbol']
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for index_name, table, column in TRIGRAM_INDEXES:
+            op.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin ({column} gin_trgm_ops)')
+
+        document = " || ' ' || ".join(f"coalesce({column}, '')" for column in SEARCH_COLUMNS)
+        op.execute(
+            f"ALTER TABLE characters ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('simple', {document})) STORED"
+        )
+        op.execute('CREATE INDEX ix_characters_search_vector ON characters USING gin (search_vector)')
+
+    elif dialect == 'sqlite':
+        columns = ', '.join(SEARCH_COLUMNS)
+        new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+        old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+        op.execute(
+            f"CREATE VIRTUAL TABLE characters_fts USING fts5({columns}, content='characters', content_rowid='id')"
+        )
+        op.execute(
+            f"CREATE TRIGGER characters_fts_insert AFTER INSERT ON characters BEGIN "
+            f"INSERT INTO characters_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER characters_fts_delete AFTER DELETE ON characters BEGIN "
+            f"INSERT INTO characters_fts(characters_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER characters_fts_update AFTER UPDATE ON characters BEGIN "
+            f"INSERT INTO characters_fts(characters_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO characters_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute("INSERT INTO characters_fts(characters_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_characters_search_vector')
+        op.execute('ALTER TABLE characters DROP COLUMN IF EXISTS search_vector')
+        for index_name, _, _ in TRIGRAM_INDEXES:
+            op.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+    elif dialect == 'sqlite':
+        for trigger in ('characters_fts_insert', 'characters_fts_delete', 'characters_fts_update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS characters_fts')
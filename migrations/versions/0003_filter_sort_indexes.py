@@ -0,0 +1,46 @@
+"""indexes for the filter and sort combinations of the character listing
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 11:00:00.000000
+
+- foreign keys (house_id, strength_id) lead composites with (name, id), covering the FK lookups, the
+  house_id/strength_id filters and "filter by house/strength, sort by name"
+- every sort column is paired with id, the tiebreaker of sorted and keyset-paginated listings
+- (age, id) also serves the age, age_more_than and age_less_than filters
+
+Plans can be checked with `flask check-query-plans`.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+# (index name, columns), must match Character.__table_args__
+INDEXES = [
+    ('ix_characters_name_id', ['name', 'id']),
+    ('ix_characters_house_id_name_id', ['house_id', 'name', 'id']),
+    ('ix_characters_strength_id_name_id', ['strength_id', 'name', 'id']),
+    ('ix_characters_age_id', ['age', 'id']),
+    ('ix_characters_role_id', ['role', 'id']),
+    ('ix_characters_nickname_id', ['nickname', 'id']),
+    ('ix_characters_animal_id', ['animal', 'id']),
+    ('ix_characters_symbol_id', ['symbol', 'id']),
+    ('ix_characters_death_id', ['death', 'id']),
+]
+
+
+def upgrade():
+    for index_name, columns in INDEXES:
+        op.create_index(index_name, 'characters', columns)
+
+
+def downgrade():
+    for index_name, _ in reversed(INDEXES):
+        op.drop_index(index_name, table_name='characters')
@@ -0,0 +1,81 @@
+"""character_read: denormalized listing table with house name and strength description inline
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 12:00:00.000000
+
+The character listing reads from this table, so filtering and sorting by house or strength is a
+single-table index scan. The application keeps it in sync on every write (app/utils/read_model.py),
+`flask rebuild-read-model` rebuilds it from scratch.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+# (index name, columns), must match CharacterRead.__table_args__
+INDEXES = [
+    ('ix_character_read_name_id', ['name', 'id']),
+    ('ix_character_read_house_name_id', ['house_name', 'id']),
+    ('ix_character_read_strength_description_id', ['strength_description', 'id']),
+    ('ix_character_read_house_id_name_id', ['house_id', 'name', 'id']),
+    ('ix_character_read_strength_id_name_id', ['strength_id', 'name', 'id']),
+    ('ix_character_read_age_id', ['age', 'id']),
+    ('ix_character_read_role_id', ['role', 'id']),
+    ('ix_character_read_nickname_id', ['nickname', 'id']),
+    ('ix_character_read_animal_id', ['animal', 'id']),
+    ('ix_character_read_symbol_id', ['symbol', 'id']),
+    ('ix_character_read_death_id', ['death', 'id']),
+]
+
+# Substring filter columns, indexed with pg_trgm on PostgreSQL (the listing filters character_read now)
+TRIGRAM_COLUMNS = ['name', 'role', 'animal', 'house_name', 'strength_description']
+
+
+def upgrade():
+    op.create_table(
+        'character_read',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('house_id', sa.Integer(), nullable=True),
+        sa.Column('house_name', sa.String(length=50), nullable=True),
+        sa.Column('animal', sa.String(length=50), nullable=True),
+        sa.Column('symbol', sa.String(length=50), nullable=True),
+        sa.Column('nickname', sa.String(length=50), nullable=True),
+        sa.Column('role', sa.String(length=100), nullable=False),
+        sa.Column('age', sa.Integer(), nullable=True),
+        sa.Column('death', sa.Integer(), nullable=True),
+        sa.Column('strength_id', sa.Integer(), nullable=True),
+        sa.Column('strength_description', sa.String(length=50), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.execute(
+        "INSERT INTO character_read (id, name, house_id, house_name, animal, symbol, nickname, role, age, death, "
+        "strength_id, strength_description) "
+        "SELECT c.id, c.name, c.house_id, h.name, c.animal, c.symbol, c.nickname, c.role, c.age, c.death, "
+        "c.strength_id, s.description "
+        "FROM characters c "
+        "LEFT OUTER JOIN houses h ON c.house_id = h.id "
+        "LEFT OUTER JOIN strengths s ON c.strength_id = s.id"
+    )
+
+    for index_name, columns in INDEXES:
+        op.create_index(index_name, 'character_read', columns)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in TRIGRAM_COLUMNS:
+            op.execute(
+                f'CREATE INDEX ix_character_read_{column}_trgm ON character_read USING gin ({column} gin_trgm_ops)'
+            )
+
+
+def downgrade():
+    op.drop_table('character_read')
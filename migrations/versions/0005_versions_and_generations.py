@@ -0,0 +1,39 @@
+"""characters.version and dataset_generations for ETags and optimistic concurrency
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 12:00:00.000000
+
+characters.version is incremented on every update of a character (and of its house or strength name) and is
+the ETag of /characters/<id>. dataset_generations holds a counter per dataset that advances with every write,
+listings derive their ETag from it.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing characters start at version 1
+    op.add_column('characters', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    dataset_generations = op.create_table(
+        'dataset_generations',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(dataset_generations, [{'name': 'characters', 'generation': 0}])
+
+
+def downgrade():
+    op.drop_table('dataset_generations')
+    # Plain ALTER TABLE (SQLite >= 3.35), a batch table rebuild would drop the FTS triggers of migration 0002
+    op.drop_column('characters', 'version')
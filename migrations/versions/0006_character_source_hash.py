@@ -0,0 +1,29 @@
+"""characters.source_hash for the incremental sync from characters.json
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 12:00:00.000000
+
+`flask sync-characters` stores the content hash of every record it writes, so a later sync only touches
+records whose hash changed and can tell synced characters (deleted when they leave the file) from
+characters created through the API (never deleted by a sync).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('characters', sa.Column('source_hash', sa.String(length=40), nullable=True))
+
+
+def downgrade():
+    # Plain ALTER TABLE (SQLite >= 3.35), a batch table rebuild would drop the FTS triggers of migration 0002
+    op.drop_column('characters', 'source_hash')
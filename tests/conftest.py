@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+import pytest
+
+# The configuration is read when the app package is imported, so the test database is chosen first:
+# TEST_DATABASE_URL (an empty PostgreSQL database, to check the pg_trgm plans too) or a temporary SQLite file
+DATABASE_DIR = tempfile.mkdtemp(prefix="got-tests-")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{os.path.join(DATABASE_DIR, 'test.db')}"
+os.environ["RESPONSE_CACHE_TTL"] = "0"  # Every request reaches the database, so query counts are real
+os.environ.setdefault("MAX_QUERIES_PER_REQUEST", "10")  # Any request issuing more statements fails its test
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from flask_migrate import upgrade  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.utils.character_import import import_characters, iter_json_array  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILE = os.path.join(BASE_DIR, "data", "characters.json")
+
+
+@pytest.fixture(scope="session")
+def app():
+    """
+    The application on a migrated database seeded with data/characters.json.
+    """
+    app = create_app()
+    with app.app_context():
+        upgrade(directory=os.path.join(BASE_DIR, "migrations"))
+        import_characters(db.session.connection(), iter_json_array(DATA_FILE))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+    shutil.rmtree(DATABASE_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope="session")
+def auth_headers(app):
+    with app.app_context():
+        return {"Authorization": f"Bearer {create_access_token(identity='tests')}"}
@@ -0,0 +1,54 @@
+import pytest
+from app import db
+from app.utils.query_guard import count_queries
+from app.utils.query_plans import (
+    PLAN_CHECK_FILTERS, SUBSTRING_FILTERS, build_listing_query, explain, is_full_scan
+)
+from app.utils.sorting import ALLOWED_SORT_FIELDS
+
+
+@pytest.mark.parametrize("sort_by", sorted(ALLOWED_SORT_FIELDS))
+@pytest.mark.parametrize("filters", PLAN_CHECK_FILTERS, ids=lambda filters: ",".join(filters) or "none")
+def test_listing_uses_an_index(app, filters, sort_by):
+    """
+    Every filter/sort combination of /characters/list is answered through an index (see flask check-query-plans).
+    """
+    with app.app_context():
+        if SUBSTRING_FILTERS & filters.keys() and db.session.connection().dialect.name != "postgresql":
+            pytest.skip("substring filters are only indexed on PostgreSQL (pg_trgm)")
+        try:
+            nodes = explain(build_listing_query(filters, sort_by))
+            full_scans = [node for node in nodes if is_full_scan(node)]
+        finally:
+            db.session.rollback()
+
+    assert nodes
+    assert not full_scans, nodes
+
+
+@pytest.mark.parametrize("query", ["", "&sort_by=house", "&role=king", "&fields=id,name&include=house,strength"])
+def test_listing_queries_do_not_grow_with_the_page(client, query):
+    """
+    A page of 50 characters costs as many statements as a page of one (no query per character).
+    """
+    client.get(f"/characters/list?limit=1{query}")  # Warms up the process-wide caches
+
+    with count_queries() as one:
+        assert client.get(f"/characters/list?limit=1{query}").status_code == 200
+    with count_queries() as fifty:
+        response = client.get(f"/characters/list?limit=50{query}")
+
+    assert response.status_code == 200
+    assert len(fifty) == len(one), fifty
+
+
+def test_character_detail_is_two_queries(client, auth_headers):
+    character_id = client.get("/characters/list?limit=1&sort_by=id").get_json()["characters"][0]["id"]
+    client.get(f"/characters/{character_id}", headers=auth_headers)  # Loads the dimension cache
+
+    # The character and the dimensions generation, houses and strengths come from the cache
+    with count_queries(max_queries=2):
+        response = client.get(f"/characters/{character_id}", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.get_json()["strength"]["description"]